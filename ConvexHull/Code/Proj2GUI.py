@@ -26,6 +26,7 @@ else:
 
 # Import the code with the actual implementation
 from convex_hull import *
+from point_sets import generate_points
 #from convex_hull_complete_nonthread import *
 
 
@@ -129,48 +130,19 @@ class Proj2GUI( QMainWindow ):
 		# TODO - ERROR CHECKING!!!!
 		if self.randBySeed.isChecked():
 			seed = int(self.randSeed.text())
-			random.seed( seed )
 		else: # do by time
-			random.seed( time.time() )
+			seed = None
 
-		ptlist = []
-		unique_xvals = {}
-		max_r  = 0.98
-		WIDTH  = 1.0
-		HEIGHT = 1.0
 		npoints = int(self.npoints.text())
 		if self.distribOval.isChecked():
-			while len(ptlist) < npoints:
-				x = random.uniform(-1.0,1.0)
-				y = random.uniform(-1.0,1.0)
-				if x**2+y**2 <= max_r**2:
-					xval = WIDTH*x
-					yval = HEIGHT*y
-					if not xval in unique_xvals:
-						ptlist.append( QPointF(xval,yval) )
-						unique_xvals[xval] = 1      # dict/map with float keys?
-		elif self.distribSphere.isChecked():		
-			while len(ptlist) < npoints:
-				x = random.uniform(-1.0,1.0)
-				y = random.uniform(-1.0,1.0)
-				z = random.uniform(-1.0,1.0)
-				if x**2 + y**2 + z**2 <= max_r**2:
-					xval = WIDTH*x
-					yval = HEIGHT*y
-					if not xval in unique_xvals:
-						ptlist.append( QPointF(xval,yval) )
-						unique_xvals[xval] = 1
+			distribution = 'uniform'
+		elif self.distribSphere.isChecked():
+			distribution = 'sphere'
 		elif self.distribGaussian.isChecked():
-			while len(ptlist) < npoints:
-				x = random.gauss(0.0,0.25)
-				y = random.gauss(0.0,0.25)
-				if x**2+y**2 <= max_r**2:
-					xval = WIDTH*x
-					yval = HEIGHT*y
-					if not xval in unique_xvals:
-						ptlist.append( QPointF(xval,yval) )
-						unique_xvals[xval] = 1
-		return ptlist
+			distribution = 'gaussian'
+		# The generators themselves live in point_sets.py so the headless
+		# benchmarks in hull_bench.py draw exactly the same point sets
+		return [QPointF(x, y) for x, y in generate_points(distribution, npoints, seed).tolist()]
 
 # Methods that handle GUI events
 	def clearClicked(self):
@@ -200,7 +172,25 @@ class Proj2GUI( QMainWindow ):
 		self.solveButton.setEnabled(False)
 		self.view.update()
 		app.processEvents()							#Why is this necessary?????
+		if self.showRecursion.isChecked():
+			# Solve in a worker thread, then animate the recorded merges on a
+			# timer; the buttons come back once the replay has finished.
+			self.worker = HullWorker(self.solver, self.points)
+			self.worker.solved.connect(self.replaySolution)
+			self.worker.start()
+			return
 		self.solver.compute_hull(self.points,self.showRecursion.isChecked(),self.view)
+		self.solveFinished()
+
+	def replaySolution(self, result):
+		hull, events, stats = result
+		self.solver.view = self.view
+		self.replay = HullReplay(self.view, self.points, hull, events)
+		self.replay.finished.connect(lambda: self.solver.showText(self.solver.statusText(self.points, stats)))
+		self.replay.finished.connect(self.solveFinished)
+		self.replay.start()
+
+	def solveFinished(self):
 		self.generateButton.setEnabled(True)
 		self.clearButton.setEnabled(True)
 		self.view.update()
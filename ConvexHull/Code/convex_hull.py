@@ -1,8 +1,8 @@
 from which_pyqt import PYQT_VER
 if PYQT_VER == 'PYQT5':
-	from PyQt5.QtCore import QLineF, QPointF, QObject
+	from PyQt5.QtCore import QLineF, QPointF, QObject, QThread, QTimer, pyqtSignal
 elif PYQT_VER == 'PYQT4':
-	from PyQt4.QtCore import QLineF, QPointF, QObject
+	from PyQt4.QtCore import QLineF, QPointF, QObject, QThread, QTimer, pyqtSignal
 else:
 	raise Exception('Unsupported Version of PyQt: {}'.format(PYQT_VER))
 
@@ -11,6 +11,10 @@ else:
 import time
 import math
 
+import numpy as np
+
+from hull_core import *
+
 # Some global color constants that might be useful
 RED = (255,0,0)
 GREEN = (0,255,0)
@@ -24,24 +28,16 @@ PAUSE = 0.25
 # This is the class you have to complete.
 #
 
-######################
-# Time Complexity O(1)
-# Space Complexity O(1)
-######################
-def findSlope(leftMostPoint, point):
-	rise = point.y() - leftMostPoint.y()
-	run = point.x() - leftMostPoint.x()
-	slope = rise / run
-	return slope
-
-
-
 class ConvexHullSolver(QObject):
 
 # Class constructor
 	def __init__( self):
 		super().__init__()
 		self.pause = False
+		# Any key of hull_core.ALGORITHMS
+		self.algorithm = 'divide_conquer'
+		# Cull interior points with hull_core.akl_toussaint_filter before solving
+		self.prefilter = False
 		
 # Some helper methods that make calls to the GUI, allowing us to send updates
 # to be displayed.
@@ -70,186 +66,104 @@ class ConvexHullSolver(QObject):
 		self.view.displayStatusText(text)
 
 
-	################################
-	# Time Complexity O(nlogn)
-	# Space Complexity O(nlogn)
-	################################
-	def solver(self, points):
-		# do recursion until only 3 or less points are left
-		if len(points) == 3:
-			rightmostPoint = points[len(points)-1]
-			#########################
-			# Time Complexity O(n)
-			# Space Complexity O(n)
-			#########################
-			sortedPoints = [points[0]] + sorted(points[1:], reverse=True, key=lambda p: findSlope(points[0], p))
-			return sortedPoints, rightmostPoint
-		elif len(points) == 2:
-			rightmostPoint = points[len(points) - 1]
-			return points, rightmostPoint
-
-		# split points into two halves, left and right
-		########################
-		# Time Complexity O(n)
-		# Space Complexity O(n)
-		########################
-		left = [left for left in points[0:math.floor(len(points)/2)]]
-		right = [right for right in points[math.floor(len(points)/2):len(points)]]
-
-		# recursively run both halves
-		left_half, rightmostPoint_left = self.solver(left)
-		right_half, rightmostPoint_right = self.solver(right)
-
-		#########################
-		# Time Complexity O(n)
-		# Space Complexity O(n)
-		#########################
-		if (len(left_half) <= 3):
-			left_half = [left_half[0]] + sorted(left_half[1:], reverse=True, key=lambda p: findSlope(left_half[0], p))
-
-		if (len(right_half) <= 3):
-			right_half = [right_half[0]] + sorted(right_half[1:], reverse=True, key=lambda p: findSlope(right_half[0], p))
-
-
-		# set the left/right most points
-		leftMost_left = left_half[0]
-		leftMost_right = right_half[0]
-
-		# begin merging the Hulls
-		# top
-		slope = findSlope(rightmostPoint_left, leftMost_right)
-		topLine_right = leftMost_right
-		topLine_left = rightmostPoint_left
-
-		leftPos = left_half.index(rightmostPoint_left)
-		rightPos = right_half.index(leftMost_right)
-		numChanges = 3
-		########################
-		# Time Complexity O(n)
-		# Space Complexity O(n)
-		########################
-		while(numChanges > 0):
-			leftChange = True
-			while(leftChange):
-				if (findSlope(topLine_left, topLine_right) > findSlope(left_half[leftPos - 1], topLine_right)):
-					topLine_left = left_half[leftPos - 1]
-					leftPos -= 1
-					numChanges += 1
-				else:
-					leftChange = False
-					numChanges -= 1
-
-			rightChange = True
-			while(rightChange):
-				if (findSlope(topLine_left, topLine_right) < findSlope(topLine_left, right_half[(rightPos + 1) % len(right_half)])):
-					topLine_right = right_half[(rightPos + 1) % len(right_half)]
-					rightPos += 1
-					numChanges += 1
-				else:
-					rightChange = False
-					numChanges -= 1
-
-		# bot
-		leftPos = left_half.index(rightmostPoint_left)
-		rightPos = right_half.index(leftMost_right)
-		botLine_right = leftMost_right
-		botLine_left = rightmostPoint_left
-		numChanges = 3
-		########################
-		# Time Complexity O(n)
-		# Space Complexity O(n)
-		########################
-		while(numChanges > 0):
-			leftChange = True
-			while(leftChange):
-				if (findSlope(botLine_left, botLine_right) < findSlope(left_half[(leftPos + 1) % len(left_half)], botLine_right)):
-					botLine_left = left_half[(leftPos + 1) % len(left_half)]
-					leftPos += 1
-					numChanges += 1
-				else:
-					leftChange = False
-					numChanges -= 1
-
-			rightChange = True
-			while(rightChange):
-				if (findSlope(botLine_left, botLine_right) > findSlope(botLine_left, right_half[rightPos - 1])):
-					botLine_right = right_half[rightPos - 1]
-					rightPos -= 1
-					numChanges += 1
-				else:
-					rightChange = False
-					numChanges -= 1
-
-		points_to_return = []
-		########################
-		# Time Complexity O(n)
-		# Space Complexity O(n)
-		########################
-		for i in range(len(left_half)):
-			if (left_half[i % len(left_half)] == topLine_left):
-				points_to_return.append(left_half[i % len(left_half)])
-				break
-			else:
-				points_to_return.append(left_half[i % len(left_half)])
-		########################
-		# Time Complexity O(n)
-		# Space Complexity O(n)
-		########################
-		for i in range(len(right_half)):
-			j = i + right_half.index(topLine_right)
-			if (right_half[j % len(right_half)] == botLine_right):
-				points_to_return.append(right_half[j % len(right_half)])
-				break
-			else:
-				points_to_return.append(right_half[j % len(right_half)])
-		########################
-		# Time Complexity O(n)
-		# Space Complexity O(n)
-		########################
-		for i in range(len(left_half)):
-			j = i + left_half.index(botLine_left)
-			if (j > len(left_half)):
-				break
-			if (left_half[j % len(left_half)] == left_half[0]):
-				break
-			else:
-				points_to_return.append(left_half[j % len(left_half)])
-
-		return points_to_return, rightmostPoint_right
-
+# Runs the hull engine only, without touching the GUI, so it is safe to call
+# from a worker thread. With record=True the divide and conquer merges are
+# logged as events (see hull_core.convex_hull) for HullReplay to animate.
+# The log costs O(nlogn) memory; mapping it back to point indices happens
+# after the hull timer stops, so the reported times match an unrecorded run.
+	def solve(self, points, record=False):
+		assert( type(points) == list and type(points[0]) == QPointF )
+		coordinates = np.array([(p.x(), p.y()) for p in points], dtype=np.float64)
+		stats = {}
+		events = [] if record else None
+		hull = convex_hull(coordinates, algorithm=self.algorithm, prefilter=self.prefilter,
+						   stats=stats, events=events)
+		return hull, events, stats
+
+	def polygon(self, points, hull):
+		# when passing lines to the display, pass a list of QLineF objects.  Each QLineF
+		# object can be created with two QPointF objects corresponding to the endpoints
+		return [QLineF(points[hull[i]], points[hull[(i + 1) % len(hull)]]) for i in range(len(hull))]
 
+	def statusText(self, points, stats):
+		text = 'Time Elapsed (QuickSort): {:3.14f}'.format(stats['sort_time']) + '  Time Elapsed (Convex Hull): {:3.14f} sec'.format(stats['hull_time'])
+		if self.prefilter:
+			text += '  Culled: {} of {} points'.format(stats['culled'], len(points))
+		return text
 
 # This is the method that gets called by the GUI and actually executes
 # the finding of the hull
 	def compute_hull( self, points, pause, view):
 		self.pause = pause
 		self.view = view
-		assert( type(points) == list and type(points[0]) == QPointF )
+		# The hull itself is computed by the Qt-free engine in hull_core.py;
+		# this method only converts to and from the GUI's QPointF/QLineF objects.
+		# The recursion is never slowed down here: to watch it, run solve() in a
+		# HullWorker and play the recorded events back with a HullReplay.
+		hull, _, stats = self.solve(points)
+		self.view.addLines(self.polygon(points, hull), RED)
+		self.showText(self.statusText(points, stats))
 
-		t1 = time.time()
-		# TODO: SORT THE POINTS BY INCREASING X-VALUE
-
-		##########################
-		# Time Complexity O(nlogn)
-		# Space Complexity O(n)
-		##########################
-		points = sorted(points, key=lambda k: k.x())
-		t2 = time.time()
-
-		t3 = time.time()
-		# this is a dummy polygon of the first 3 unsorted points
-		# polygon = [QLineF(points[i],points[(i+1)%3]) for i in range(3)]
-		returnedPoints, rightMostPoint = self.solver(points)
-		polygon = [QLineF(returnedPoints[i], returnedPoints[(i + 1) % len(returnedPoints)]) for i in range(len(returnedPoints))]
-		# TODO: REPLACE THE LINE ABOVE WITH A CALL TO YOUR DIVIDE-AND-CONQUER CONVEX HULL SOLVER
-		t4 = time.time()
-		self.showHull(polygon, RED)
-		# when passing lines to the display, pass a list of QLineF objects.  Each QLineF
-		# object can be created with two QPointF objects corresponding to the endpoints
-		self.showText('Time Elapsed (QuickSort): {:3.14f}'.format(t2-t1) + '  Time Elapsed (Convex Hull): {:3.14f} sec'.format(t4-t3))
 
+# Computes a hull in a background thread so the GUI stays responsive, then
+# hands (hull, events, stats) back to the GUI thread through the solved signal.
+class HullWorker(QThread):
+	solved = pyqtSignal(object)
 
+	def __init__(self, solver, points, record=True):
+		super().__init__()
+		self.solver = solver
+		self.points = points
+		self.record = record
 
+	def run(self):
+		self.solved.emit(self.solver.solve(self.points, self.record))
 
 
+# Plays a recorded event log back on a QTimer, one step every PAUSE seconds.
+# Each merge takes three ticks: the two sub-hulls in blue, then the tangents
+# in green, then both are erased. The final hull is drawn in red at the end.
+# The timer runs in the GUI thread, so the view can be updated directly.
+class HullReplay(QObject):
+	finished = pyqtSignal()
 
+	def __init__(self, view, points, hull, events, interval=PAUSE):
+		super().__init__()
+		self.view = view
+		self.points = points
+		self.hull = hull
+		self.events = events
+		self.steps = self.play()
+		self.timer = QTimer(self)
+		self.timer.setInterval(int(interval * 1000))
+		self.timer.timeout.connect(self.step)
+
+	def start(self):
+		self.timer.start()
+
+	def stop(self):
+		self.timer.stop()
+
+	def step(self):
+		try:
+			next(self.steps)
+		except StopIteration:
+			self.timer.stop()
+			self.finished.emit()
+
+	def lines(self, hull):
+		points = self.points
+		return [QLineF(points[hull[i]], points[hull[(i + 1) % len(hull)]]) for i in range(len(hull))]
+
+	def play(self):
+		points = self.points
+		for left, right, top, bot in self.events:
+			hulls = self.lines(left) + self.lines(right)
+			# addLines may keep the list it is given, so always hand it a copy
+			self.view.addLines(list(hulls), BLUE)
+			yield
+			tangents = [QLineF(points[top[0]], points[top[1]]), QLineF(points[bot[0]], points[bot[1]])]
+			self.view.addLines(list(tangents), GREEN)
+			yield
+			self.view.clearLines(hulls + tangents)
+		self.view.addLines(self.lines(self.hull), RED)
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+
+# Benchmarks for the Qt-free hull engine in hull_core.py. Run from this directory:
+#
+#     python3 hull_bench.py                  # dynamic, prefilter, memory and output-sensitive tables
+#     python3 hull_bench.py --sweep --json results.json --csv results.csv
+#
+# Everything here is headless; no PyQt is needed.
+
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from hull_core import *
+from point_sets import DISTRIBUTIONS, generate_points, uniform_points
+
+
+# n points of which exactly h are hull vertices: h evenly spaced on the unit
+# circle, the rest uniform in a disc strictly inside that h-gon
+def points_with_hull_size(n, h, rng):
+	t = np.linspace(0.0, 2.0 * np.pi, h, endpoint=False)
+	ring = np.column_stack((np.cos(t), np.sin(t)))
+	inner = 0.9 * np.cos(np.pi / h) / 0.98 * uniform_points(n - h, rng)
+	return rng.permutation(np.concatenate((ring, inner)))
+
+def bench_output_sensitive(n=200000, hull_sizes=(4, 16, 64, 256, 1024, 4096, 16384),
+						   algorithms=('chan', 'monotone_chain', 'divide_conquer'), seed=312):
+	# Sort plus hull time at fixed n as the hull size h grows, to show where
+	# Chan's O(n log h), which skips the global sort, beats the O(n log n) modes
+	rng = np.random.default_rng(seed)
+	rows = []
+	for h in hull_sizes:
+		pts = points_with_hull_size(n, h, rng)
+		row = {'n': n, 'h': h}
+		for algorithm in algorithms:
+			stats = {}
+			hull = convex_hull(pts, algorithm=algorithm, stats=stats)
+			assert len(hull) == h, (algorithm, len(hull), h)
+			row[algorithm] = stats['sort_time'] + stats['hull_time']
+		rows.append(row)
+	return rows
+
+class ListCopyingHull:
+	# Reference copy of the divide-and-conquer solver from before the
+	# index-range rework, kept so bench_memory can show the old engine's peak
+	# allocation next to the current one. Every level slices its point list
+	# into left/right copies and builds each merged hull as a fresh list.
+	# Every hull it returns is a list of point indices in clockwise order
+	# starting from its leftmost point, together with the position of its
+	# rightmost point in that list.
+
+	def __init__(self, xs, ys):
+		# Scalar indexing into Python lists is much cheaper than into NumPy
+		# arrays, and the recursion does nothing but scalar lookups
+		self.xs = xs.tolist()
+		self.ys = ys.tolist()
+
+	def orient(self, a, b, c):
+		return orient(self.xs, self.ys, a, b, c)
+
+	######################
+	# Time Complexity O(1)
+	# Space Complexity O(1)
+	######################
+	def rises(self, anchor, end, candidate, side):
+		# True if moving one end of a tangent from `end` to `candidate`, with the
+		# other end fixed at `anchor`, pushes the line outward. side (1 or -1)
+		# picks which turn direction counts as outward, so one helper serves all
+		# four tangent walks. A collinear candidate only counts if it lies past
+		# `end`, so degenerate (collinear) hulls still end at their extreme points.
+		turn = self.orient(anchor, end, candidate) * side
+		if turn != 0:
+			return turn > 0
+		xs, ys = self.xs, self.ys
+		return ((xs[candidate] - xs[end]) * (xs[anchor] - xs[end]) +
+				(ys[candidate] - ys[end]) * (ys[anchor] - ys[end])) < 0
+
+	################################
+	# Time Complexity O(nlogn)
+	# Space Complexity O(nlogn)
+	################################
+	def solve(self, points):
+		# do recursion until only 3 or less points are left
+		if len(points) <= 2:
+			return list(points), len(points) - 1
+		if len(points) == 3:
+			a, b, c = points
+			turn = self.orient(a, b, c)
+			if turn < 0:
+				return [a, b, c], 2
+			elif turn > 0:
+				return [a, c, b], 1
+			return [a, c], 1
+
+		# split points into two halves, left and right
+		########################
+		# Time Complexity O(n)
+		# Space Complexity O(n)
+		########################
+		left = points[:len(points) // 2]
+		right = points[len(points) // 2:]
+
+		# recursively run both halves
+		left_half, rightmost_left = self.solve(left)
+		right_half, rightmost_right = self.solve(right)
+		return self.merge(left_half, rightmost_left, right_half, rightmost_right)
+
+	########################
+	# Time Complexity O(n)
+	# Space Complexity O(n)
+	########################
+	def merge(self, left_half, rightmost_left, right_half, rightmost_right):
+		nl = len(left_half)
+		nr = len(right_half)
+
+		# top: walk the left end counterclockwise and the right end clockwise
+		# until neither can rise above the line between them
+		i, j = rightmost_left, 0
+		changed = True
+		while changed:
+			changed = False
+			while self.rises(right_half[j], left_half[i], left_half[(i - 1) % nl], -1):
+				i = (i - 1) % nl
+				changed = True
+			while self.rises(left_half[i], right_half[j], right_half[(j + 1) % nr], 1):
+				j = (j + 1) % nr
+				changed = True
+		top_left, top_right = i, j
+
+		# bot: the mirror image, walking the other way round each hull
+		i, j = rightmost_left, 0
+		changed = True
+		while changed:
+			changed = False
+			while self.rises(right_half[j], left_half[i], left_half[(i + 1) % nl], 1):
+				i = (i + 1) % nl
+				changed = True
+			while self.rises(left_half[i], right_half[j], right_half[(j - 1) % nr], -1):
+				j = (j - 1) % nr
+				changed = True
+		bot_left, bot_right = i, j
+
+		# left hull up to the top tangent, right hull clockwise from the top
+		# tangent to the bottom one, then left hull from the bottom tangent back
+		# round to (but not including) the leftmost point
+		points_to_return = left_half[:top_left + 1]
+		j = top_right
+		while True:
+			points_to_return.append(right_half[j])
+			if j == bot_right:
+				break
+			j = (j + 1) % nr
+		if bot_left != 0:
+			points_to_return.extend(left_half[bot_left:])
+		return points_to_return, points_to_return.index(right_half[rightmost_right])
+
+def bench_memory(sizes=(100000, 1000000), algorithms=('divide_conquer', 'monotone_chain', 'chan'), seed=312):
+	# Peak Python heap allocated while each hull algorithm runs (tracemalloc),
+	# not counting the coordinate arrays and sort order it is handed. The
+	# list_copying column is ListCopyingHull, the divide-and-conquer engine
+	# before the index-range rework, run exactly as its mode used to be.
+	engines = {'list_copying': lambda xs, ys, order: ListCopyingHull(xs, ys).solve(order.tolist())[0]}
+	engines.update((algorithm, ALGORITHMS[algorithm]) for algorithm in algorithms)
+	rng = np.random.default_rng(seed)
+	rows = []
+	for n in sizes:
+		xs, ys = as_coordinates(uniform_points(n, rng))
+		order = sort_points(xs, ys)
+		row = {'n': n}
+		hulls = {}
+		for name, engine in engines.items():
+			tracemalloc.start()
+			hulls[name] = engine(xs, ys, order)
+			row[name] = tracemalloc.get_traced_memory()[1] / 1e6
+			tracemalloc.stop()
+		if 'divide_conquer' in hulls:
+			assert list(hulls['list_copying']) == list(hulls['divide_conquer'])
+		rows.append(row)
+	return rows
+
+def bench_prefilter(n=1000000, directions=(8, 16, 32), distributions=tuple(DISTRIBUTIONS), seed=312):
+	# Fraction of the GUI's point sets akl_toussaint_filter culls, and its
+	# time, for each number of extreme directions
+	rows = []
+	for distribution in distributions:
+		xs, ys = as_coordinates(generate_points(distribution, n, seed))
+		for k in directions:
+			t1 = time.perf_counter()
+			_, culled = akl_toussaint_filter(xs, ys, k)
+			t2 = time.perf_counter()
+			rows.append({'distribution': distribution, 'n': n, 'directions': k,
+						 'culled': culled / n, 'filter_time': t2 - t1})
+	return rows
+
+def bench_dynamic(n=100000, fraction=0.01, ticks=20, hull_size=8, vertex_moves=200, seed=312):
+	# Each tick moves `fraction` of the points (a delete plus an insert each).
+	# Compares DynamicHull update throughput with recomputing the whole hull
+	# every tick, and checks both give the same hull at the end. Then the
+	# worst case: on n points with only hull_size hull vertices, each of
+	# vertex_moves rounds deletes a hull vertex and puts it back.
+	rng = np.random.default_rng(seed)
+	pts = [tuple(p) for p in uniform_points(n, rng).tolist()]
+	moves = max(1, int(n * fraction))
+	dynamic = DynamicHull(pts)
+
+	update_time = 0.0
+	recompute_time = 0.0
+	for tick in range(ticks):
+		victims = rng.choice(len(pts), moves, replace=False)
+		fresh = [tuple(p) for p in uniform_points(moves, rng).tolist()]
+		t1 = time.perf_counter()
+		for v, q in zip(victims, fresh):
+			dynamic.delete(pts[v])
+			dynamic.insert(q)
+		hull = dynamic.hull()
+		t2 = time.perf_counter()
+		update_time += t2 - t1
+		for v, q in zip(victims, fresh):
+			pts[v] = q
+		t3 = time.perf_counter()
+		full = convex_hull(np.array(pts), algorithm='monotone_chain')
+		t4 = time.perf_counter()
+		recompute_time += t4 - t3
+	assert set(hull) == set(pts[i] for i in full)
+
+	dynamic = DynamicHull(tuple(p) for p in points_with_hull_size(n, hull_size, rng).tolist())
+	ring = dynamic.hull()
+	assert len(ring) == hull_size
+	t1 = time.perf_counter()
+	for i in range(vertex_moves):
+		v = ring[i % hull_size]
+		dynamic.delete(v)
+		dynamic.insert(v)
+	t2 = time.perf_counter()
+	assert dynamic.hull() == ring
+
+	updates = 2 * moves * ticks
+	return {'n': n, 'moves_per_tick': moves, 'ticks': ticks,
+			'dynamic_updates_per_sec': updates / update_time,
+			'dynamic_ticks_per_sec': ticks / update_time,
+			'recompute_ticks_per_sec': ticks / recompute_time,
+			'hull_size': hull_size, 'vertex_move_time': (t2 - t1) / vertex_moves}
+
+
+SWEEP_SIZES = tuple(10 ** e for e in range(2, 8))
+SWEEP_FIELDS = ('distribution', 'algorithm', 'n', 'h', 'sort_time', 'hull_time')
+
+def bench_sweep(sizes=SWEEP_SIZES, distributions=tuple(DISTRIBUTIONS), algorithms=tuple(ALGORITHMS),
+				repeat=3, seed=312, progress=None):
+	# Sort time and hull time (best of `repeat`) for every distribution,
+	# algorithm and size. Each (distribution, n) point set is drawn once from
+	# `seed` and shared by all algorithms, and every algorithm must return the
+	# same number of hull vertices on it.
+	rows = []
+	for distribution in distributions:
+		for n in sizes:
+			pts = DISTRIBUTIONS[distribution](n, np.random.default_rng(seed))
+			expected = None
+			for algorithm in algorithms:
+				best = None
+				for _ in range(repeat):
+					stats = {}
+					hull = convex_hull(pts, algorithm=algorithm, stats=stats)
+					if best is None or stats['sort_time'] + stats['hull_time'] < best['sort_time'] + best['hull_time']:
+						best = stats
+				if expected is None:
+					expected = len(hull)
+				assert len(hull) == expected, (distribution, n, algorithm, len(hull), expected)
+				row = {'distribution': distribution, 'algorithm': algorithm, 'n': n, 'h': len(hull),
+					   'sort_time': best['sort_time'], 'hull_time': best['hull_time']}
+				rows.append(row)
+				if progress is not None:
+					progress(row)
+	return rows
+
+def fit_exponent(ns, times):
+	# Least-squares slope of log(time) against log(n): time ~ c * n**slope.
+	# Zero times (below the clock resolution) are left out of the fit.
+	pairs = [(math.log(n), math.log(t)) for n, t in zip(ns, times) if t > 0]
+	if len(pairs) < 2:
+		return None
+	mx = sum(x for x, _ in pairs) / len(pairs)
+	my = sum(y for _, y in pairs) / len(pairs)
+	sxx = sum((x - mx) ** 2 for x, _ in pairs)
+	sxy = sum((x - mx) * (y - my) for x, y in pairs)
+	return sxy / sxx if sxx else None
+
+def fit_exponents(rows):
+	# Scaling exponents of sort, hull and total time per (distribution, algorithm)
+	groups = {}
+	for r in rows:
+		groups.setdefault((r['distribution'], r['algorithm']), []).append(r)
+	fits = []
+	for (distribution, algorithm), group in groups.items():
+		ns = [r['n'] for r in group]
+		fits.append({'distribution': distribution, 'algorithm': algorithm,
+					 'n_min': min(ns), 'n_max': max(ns),
+					 'sort_exponent': fit_exponent(ns, [r['sort_time'] for r in group]),
+					 'hull_exponent': fit_exponent(ns, [r['hull_time'] for r in group]),
+					 'total_exponent': fit_exponent(ns, [r['sort_time'] + r['hull_time'] for r in group])})
+	return fits
+
+def write_json(path, rows, fits, config):
+	with open(path, 'w') as f:
+		json.dump({'config': config, 'results': rows, 'fits': fits}, f, indent=2)
+
+def write_csv(path, rows):
+	with open(path, 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS)
+		writer.writeheader()
+		writer.writerows(rows)
+
+def print_tables(sizes):
+	# The dynamic, prefilter, memory and output-sensitive tables
+	print('Dynamic hull, 1% of points moved per tick; hull vertex delete + insert with h = 8')
+	print('{:>9}{:>8}{:>18}{:>18}{:>18}{:>18}'.format('n', 'moves', 'updates/sec', 'dyn ticks/sec',
+		'full ticks/sec', 'vertex move ms'))
+	for n in sizes:
+		r = bench_dynamic(n)
+		print('{:>9}{:>8}{:>18.0f}{:>18.2f}{:>18.2f}{:>18.3f}'.format(r['n'], r['moves_per_tick'],
+			r['dynamic_updates_per_sec'], r['dynamic_ticks_per_sec'], r['recompute_ticks_per_sec'],
+			1000 * r['vertex_move_time']))
+	print()
+
+	rows = bench_prefilter()
+	print('Akl-Toussaint prefilter at n = {}'.format(rows[0]['n']))
+	print('{:>10}{:>12}{:>12}{:>12}'.format('dist', 'directions', 'culled', 'sec'))
+	for r in rows:
+		print('{:>10}{:>12}{:>12.4%}{:>12.4f}'.format(r['distribution'], r['directions'], r['culled'], r['filter_time']))
+	print()
+
+	rows = bench_memory()
+	algorithms = [k for k in rows[0] if k != 'n']
+	print('Peak allocation during the hull (MB)')
+	print('{:>9}'.format('n') + ''.join('{:>16}'.format(a) for a in algorithms))
+	for r in rows:
+		print('{:>9}'.format(r['n']) + ''.join('{:>16.1f}'.format(r[a]) for a in algorithms))
+	print()
+
+	rows = bench_output_sensitive()
+	algorithms = [k for k in rows[0] if k not in ('n', 'h')]
+	print('Sort + hull time (sec) at n = {} as h grows'.format(rows[0]['n']))
+	print('{:>7}'.format('h') + ''.join('{:>16}'.format(a) for a in algorithms))
+	for r in rows:
+		print('{:>7}'.format(r['h']) + ''.join('{:>16.4f}'.format(r[a]) for a in algorithms))
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Headless benchmarks for the convex hull engine.')
+	parser.add_argument('sizes', nargs='*', type=int,
+						help='point counts for the dynamic hull table (default 10^4 10^5 10^6)')
+	parser.add_argument('--sweep', action='store_true',
+						help='run the size sweep over every distribution and algorithm instead')
+	parser.add_argument('--min-exp', type=int, default=2, help='smallest sweep size, as a power of ten')
+	parser.add_argument('--max-exp', type=int, default=7, help='largest sweep size, as a power of ten')
+	parser.add_argument('--distributions', nargs='+', choices=sorted(DISTRIBUTIONS), default=list(DISTRIBUTIONS))
+	parser.add_argument('--algorithms', nargs='+', choices=sorted(ALGORITHMS), default=list(ALGORITHMS))
+	parser.add_argument('--repeat', type=int, default=3, help='runs per measurement; the best is kept')
+	parser.add_argument('--seed', type=int, default=312)
+	parser.add_argument('--json', metavar='PATH', help='write the sweep results and fits as JSON')
+	parser.add_argument('--csv', metavar='PATH', help='write the sweep results as CSV')
+	args = parser.parse_args()
+
+	if not args.sweep:
+		print_tables(args.sizes or [10000, 100000, 1000000])
+		sys.exit(0)
+
+	sizes = [10 ** e for e in range(args.min_exp, args.max_exp + 1)]
+	print('{:>10}{:>16}{:>10}{:>8}{:>12}{:>12}'.format('dist', 'algorithm', 'n', 'h', 'sort', 'hull'))
+	def progress(r):
+		print('{:>10}{:>16}{:>10}{:>8}{:>12.5f}{:>12.5f}'.format(r['distribution'], r['algorithm'],
+			r['n'], r['h'], r['sort_time'], r['hull_time']), flush=True)
+	rows = bench_sweep(sizes, args.distributions, args.algorithms, args.repeat, args.seed, progress)
+	fits = fit_exponents(rows)
+	print()
+	print('Scaling exponents, time ~ n^k, over n = {} .. {}'.format(sizes[0], sizes[-1]))
+	print('{:>10}{:>16}{:>8}{:>8}{:>8}'.format('dist', 'algorithm', 'sort', 'hull', 'total'))
+	fmt = lambda k: '{:>8}'.format('-') if k is None else '{:>8.2f}'.format(k)
+	for f in fits:
+		print('{:>10}{:>16}'.format(f['distribution'], f['algorithm'])
+			  + fmt(f['sort_exponent']) + fmt(f['hull_exponent']) + fmt(f['total_exponent']))
+
+	config = {'sizes': sizes, 'distributions': args.distributions, 'algorithms': args.algorithms,
+			  'repeat': args.repeat, 'seed': args.seed, 'python': platform.python_version(),
+			  'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+	if args.json:
+		write_json(args.json, rows, fits, config)
+	if args.csv:
+		write_csv(args.csv, rows)
@@ -0,0 +1,974 @@
+# Qt-free convex hull engine. Coordinates live in two contiguous float64
+# arrays and hulls are lists of point indices, so nothing here needs PyQt and
+# no per-point Python objects are created. convex_hull.py is the GUI adapter.
+
+import bisect
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from array import array
+
+
+######################
+# Time Complexity O(n)
+# Space Complexity O(n)
+######################
+def as_coordinates(points, y=None):
+	# Accepts an (n, 2) array-like, or separate x and y array-likes, and returns
+	# contiguous float64 (xs, ys) arrays
+	if y is None:
+		pts = np.asarray(points, dtype=np.float64)
+		if pts.ndim != 2 or pts.shape[1] != 2:
+			raise ValueError('points must have shape (n, 2), got {}'.format(pts.shape))
+		xs, ys = pts[:, 0], pts[:, 1]
+	else:
+		xs, ys = np.asarray(points, dtype=np.float64), np.asarray(y, dtype=np.float64)
+		if xs.shape != ys.shape or xs.ndim != 1:
+			raise ValueError('x and y must be 1-d arrays of the same length')
+	return np.ascontiguousarray(xs), np.ascontiguousarray(ys)
+
+######################
+# Time Complexity O(1)
+# Space Complexity O(1)
+######################
+def orient(xs, ys, a, b, c):
+	# Cross product of (b - a) and (c - a) for point indices a, b, c.
+	# > 0: counterclockwise turn (c left of a->b), < 0: clockwise, 0: collinear
+	return (xs[b] - xs[a]) * (ys[c] - ys[a]) - (ys[b] - ys[a]) * (xs[c] - xs[a])
+
+##########################
+# Time Complexity O(nlogn)
+# Space Complexity O(n)
+##########################
+def sort_points(xs, ys):
+	# Indices sorted by increasing x (ties by y) with exact duplicate points
+	# dropped, so the halves split by the solver are always separated
+	order = np.lexsort((ys, xs))
+	if len(order) > 1:
+		sx, sy = xs[order], ys[order]
+		keep = np.ones(len(order), dtype=bool)
+		keep[1:] = (sx[1:] != sx[:-1]) | (sy[1:] != sy[:-1])
+		order = order[keep]
+	return order
+
+
+# Extreme directions akl_toussaint_filter takes by default. The polygon of k
+# extremes of a uniform disc covers (k/2pi)sin(2pi/k) of it: about 90% for 8,
+# 97% for 16, 99% for 32, at one extra O(n) pass per direction.
+AKL_TOUSSAINT_DIRECTIONS = 16
+
+######################
+# Time Complexity O(kn) for k directions
+# Space Complexity O(n)
+######################
+def akl_toussaint_filter(xs, ys, directions=AKL_TOUSSAINT_DIRECTIONS):
+	# Akl-Toussaint interior culling. Takes the extreme points in `directions`
+	# evenly spaced directions, which form a convex polygon inside the hull,
+	# and drops every point strictly inside that polygon, one vectorized
+	# orientation pass per edge. Returns the indices of the surviving points
+	# (in input order) and how many were removed.
+	n = len(xs)
+	everything = np.arange(n)
+	if n < 4:
+		return everything, 0
+	# counterclockwise from the +x direction
+	angles = 2.0 * np.pi * np.arange(directions) / directions
+	extremes = [np.argmax(np.cos(t) * xs + np.sin(t) * ys) for t in angles]
+	polygon = []
+	for e in extremes:
+		if not polygon or (xs[e], ys[e]) != (xs[polygon[-1]], ys[polygon[-1]]):
+			polygon.append(e)
+	if len(polygon) > 1 and (xs[polygon[0]], ys[polygon[0]]) == (xs[polygon[-1]], ys[polygon[-1]]):
+		polygon.pop()
+	if len(polygon) < 3:
+		return everything, 0
+
+	inside = np.ones(n, dtype=bool)
+	for k in range(len(polygon)):
+		a, b = polygon[k], polygon[(k + 1) % len(polygon)]
+		inside &= (xs[b] - xs[a]) * (ys - ys[a]) - (ys[b] - ys[a]) * (xs - xs[a]) > 0
+	keep = np.flatnonzero(~inside)
+	return keep, n - len(keep)
+
+# Typecode of the compact integer arrays hull chains are held in. array
+# objects store raw machine ints and are not tracked by the garbage collector,
+# unlike lists of Python ints.
+HULL_TYPECODE = 'l'
+
+
+class DivideAndConquerHull:
+	# The divide-and-conquer solver. The coordinates are held once, in two
+	# flat float buffers that must already be in sorted order, and the
+	# recursion works on index ranges into them, so splitting never copies
+	# anything. Every hull is an array of positions in clockwise order starting
+	# from its leftmost point, together with the position of its rightmost
+	# point in that array.
+
+	def __init__(self, xs, ys, events=None):
+		# array('d') indexes almost as fast as a list but stores raw doubles,
+		# a quarter of the memory of a list of float objects
+		self.xs = array('d', np.ascontiguousarray(xs, dtype=np.float64).tobytes())
+		self.ys = array('d', np.ascontiguousarray(ys, dtype=np.float64).tobytes())
+		# If a list is given, every merge appends (left hull, right hull,
+		# top tangent, bottom tangent) to it, for replaying the recursion later.
+		# The hulls are the solver's own arrays, which are never modified
+		# after they are built, so recording itself copies nothing; the log
+		# does keep every intermediate hull alive, O(nlogn) positions in all.
+		self.events = events
+
+	def orient(self, a, b, c):
+		return orient(self.xs, self.ys, a, b, c)
+
+	######################
+	# Time Complexity O(1)
+	# Space Complexity O(1)
+	######################
+	def rises(self, anchor, end, candidate, side):
+		# True if moving one end of a tangent from `end` to `candidate`, with the
+		# other end fixed at `anchor`, pushes the line outward. side (1 or -1)
+		# picks which turn direction counts as outward, so one helper serves all
+		# four tangent walks. A collinear candidate only counts if it lies past
+		# `end`, so degenerate (collinear) hulls still end at their extreme points.
+		turn = self.orient(anchor, end, candidate) * side
+		if turn != 0:
+			return turn > 0
+		xs, ys = self.xs, self.ys
+		return ((xs[candidate] - xs[end]) * (xs[anchor] - xs[end]) +
+				(ys[candidate] - ys[end]) * (ys[anchor] - ys[end])) < 0
+
+	################################
+	# Time Complexity O(nlogn)
+	# Space Complexity O(n)
+	################################
+	def solve(self, lo=0, hi=None):
+		# Hull of the points at positions lo..hi-1
+		if hi is None:
+			hi = len(self.xs)
+		# do recursion until only 3 or less points are left
+		if hi - lo <= 2:
+			return array(HULL_TYPECODE, range(lo, hi)), hi - lo - 1
+		if hi - lo == 3:
+			a, b, c = lo, lo + 1, lo + 2
+			turn = self.orient(a, b, c)
+			if turn < 0:
+				return array(HULL_TYPECODE, (a, b, c)), 2
+			elif turn > 0:
+				return array(HULL_TYPECODE, (a, c, b)), 1
+			return array(HULL_TYPECODE, (a, c)), 1
+
+		# split the range into two halves, left and right, and recursively run both
+		mid = (lo + hi) // 2
+		left_half, rightmost_left = self.solve(lo, mid)
+		right_half, rightmost_right = self.solve(mid, hi)
+		return self.merge(left_half, rightmost_left, right_half, rightmost_right)
+
+	########################
+	# Time Complexity O(n)
+	# Space Complexity O(n)
+	########################
+	def merge(self, left_half, rightmost_left, right_half, rightmost_right):
+		# Merges two hulls, left_half entirely before right_half in sorted
+		# order. Either may be an array or a list of positions.
+		nl = len(left_half)
+		nr = len(right_half)
+
+		# top: walk the left end counterclockwise and the right end clockwise
+		# until neither can rise above the line between them
+		i, j = rightmost_left, 0
+		changed = True
+		while changed:
+			changed = False
+			while self.rises(right_half[j], left_half[i], left_half[(i - 1) % nl], -1):
+				i = (i - 1) % nl
+				changed = True
+			while self.rises(left_half[i], right_half[j], right_half[(j + 1) % nr], 1):
+				j = (j + 1) % nr
+				changed = True
+		top_left, top_right = i, j
+
+		# bot: the mirror image, walking the other way round each hull
+		i, j = rightmost_left, 0
+		changed = True
+		while changed:
+			changed = False
+			while self.rises(right_half[j], left_half[i], left_half[(i + 1) % nl], 1):
+				i = (i + 1) % nl
+				changed = True
+			while self.rises(left_half[i], right_half[j], right_half[(j - 1) % nr], -1):
+				j = (j - 1) % nr
+				changed = True
+		bot_left, bot_right = i, j
+		if self.events is not None:
+			self.events.append((left_half, right_half, (left_half[top_left], right_half[top_right]),
+								(left_half[bot_left], right_half[bot_right])))
+
+		# left hull up to the top tangent, right hull clockwise from the top
+		# tangent to the bottom one, then left hull from the bottom tangent back
+		# round to (but not including) the leftmost point
+		merged = array(HULL_TYPECODE, left_half[:top_left + 1])
+		if top_right <= bot_right:
+			merged.extend(right_half[top_right:bot_right + 1])
+		else:
+			merged.extend(right_half[top_right:])
+			merged.extend(right_half[:bot_right + 1])
+		if bot_left != 0:
+			merged.extend(left_half[bot_left:])
+		# the right hull's rightmost point lies on the clockwise walk from the
+		# top tangent to the bottom one
+		return merged, top_left + 1 + (rightmost_right - top_right) % nr
+
+
+##########################
+# Time Complexity O(nlogn)
+# Space Complexity O(n)
+##########################
+def divide_and_conquer_hull(xs, ys, order, events=None):
+	# DivideAndConquerHull over the x-sorted order; returns input indices.
+	# Merge events, if recorded, are appended to `events` as the solver logs
+	# them, in positions within order; translate_events maps them to indices.
+	hull, _ = DivideAndConquerHull(xs[order], ys[order], events).solve()
+	return order[np.asarray(hull, dtype=np.intp)]
+
+######################
+# Time Complexity O(nlogn)
+# Space Complexity O(nlogn)
+######################
+def translate_events(events, index):
+	# Recorded merge events with every position p replaced by index[p]. This
+	# builds new index arrays for every sub-hull, so it runs outside the timed
+	# part of convex_hull.
+	return [(index[np.asarray(left, dtype=np.intp)], index[np.asarray(right, dtype=np.intp)],
+			 (index[top[0]], index[top[1]]), (index[bot[0]], index[bot[1]]))
+			for left, right, top, bot in events]
+
+
+##########################
+# Time Complexity O(n)
+# Space Complexity O(n)
+##########################
+def _half_chain(xs, ys, idx, sign):
+	# One monotone chain over the x-sorted index list idx. sign = 1 keeps
+	# clockwise turns (the upper chain, walked left to right), sign = -1 keeps
+	# counterclockwise turns (the lower chain). Collinear points are dropped.
+	chain = []
+	for p in idx:
+		px, py = xs[p], ys[p]
+		while len(chain) >= 2:
+			a, b = chain[-2], chain[-1]
+			if sign * ((xs[b] - xs[a]) * (py - ys[a]) - (ys[b] - ys[a]) * (px - xs[a])) >= 0:
+				chain.pop()
+			else:
+				break
+		chain.append(p)
+	return chain
+
+##########################
+# Time Complexity O(n)
+# Space Complexity O(n)
+##########################
+def monotone_chain_hull(xs, ys, order):
+	# Andrew's monotone chain over the already x-sorted order. One vectorized
+	# orientation test against the line from the leftmost to the rightmost point
+	# sends every point to the upper candidates, the lower ones, or both (if on
+	# the line), so each chain only scans its own side. Returns hull indices
+	# clockwise from the leftmost point, like the divide-and-conquer solver.
+	if len(order) <= 2:
+		return order.tolist()
+	a, b = order[0], order[-1]
+	side = (xs[b] - xs[a]) * (ys[order] - ys[a]) - (ys[b] - ys[a]) * (xs[order] - xs[a])
+	upper = order[side >= 0].tolist()
+	lower = order[side <= 0].tolist()
+	xl, yl = xs.tolist(), ys.tolist()
+	upper_chain = _half_chain(xl, yl, upper, 1)
+	lower_chain = _half_chain(xl, yl, lower, -1)
+	# upper chain left to right, then the lower chain right to left without
+	# repeating the two shared endpoints
+	return upper_chain + lower_chain[-2:0:-1]
+
+# Below this many points the process pool costs more than it saves
+PARALLEL_MIN_POINTS = 20000
+
+# Runs in a worker process. Attaches to the shared coordinate and order
+# buffers, solves the slab order[lo:hi] on its own, and returns the slab hull
+# as global point indices plus the position of its rightmost point.
+def _slab_hull(names, n, m, lo, hi):
+	blocks = [shared_memory.SharedMemory(name=name) for name in names]
+	try:
+		xs = np.ndarray((n,), dtype=np.float64, buffer=blocks[0].buf)
+		ys = np.ndarray((n,), dtype=np.float64, buffer=blocks[1].buf)
+		order = np.ndarray((m,), dtype=np.intp, buffer=blocks[2].buf)
+		slab = order[lo:hi].copy()
+		# local copies of just this slab's coordinates, so the solver never
+		# touches the other slabs' memory
+		hull, rightmost = DivideAndConquerHull(xs[slab], ys[slab]).solve()
+		return slab[np.asarray(hull, dtype=np.intp)].tolist(), rightmost
+	finally:
+		for block in blocks:
+			block.close()
+
+################################
+# Time Complexity O(nlogn / P + P h)
+# Space Complexity O(n)
+################################
+def parallel_hull(xs, ys, order, workers=None):
+	# Parallel divide and conquer. The x-sorted order is cut into one slab per
+	# worker; each worker solves its slab from shared-memory copies of the
+	# coordinate and order buffers, and the slab hulls are then merged pairwise,
+	# level by level, with the same tangent-finding merge the serial solver uses.
+	workers = workers or os.cpu_count() or 1
+	n, m = len(xs), len(order)
+	if workers == 1 or m < PARALLEL_MIN_POINTS:
+		return divide_and_conquer_hull(xs, ys, order)
+
+	blocks = []
+	try:
+		for buf in (xs, ys, np.ascontiguousarray(order, dtype=np.intp)):
+			block = shared_memory.SharedMemory(create=True, size=max(buf.nbytes, 1))
+			np.ndarray(buf.shape, dtype=buf.dtype, buffer=block.buf)[:] = buf
+			blocks.append(block)
+		names = [block.name for block in blocks]
+		bounds = np.linspace(0, m, workers + 1).astype(int)
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			futures = [executor.submit(_slab_hull, names, n, m, bounds[i], bounds[i + 1])
+					   for i in range(workers) if bounds[i] < bounds[i + 1]]
+			hulls = [f.result() for f in futures]
+	finally:
+		for block in blocks:
+			block.close()
+			block.unlink()
+
+	# The merges only ever look at slab hull vertices, so the merger gets just
+	# those, renumbered 0..k-1 in slab order
+	vertices = np.array([v for hull, _ in hulls for v in hull], dtype=np.intp)
+	merger = DivideAndConquerHull(xs[vertices], ys[vertices])
+	start = 0
+	for i, (hull, rightmost) in enumerate(hulls):
+		hulls[i] = list(range(start, start + len(hull))), rightmost
+		start += len(hull)
+
+	# reduction tree: merge neighbouring slab hulls until one is left
+	while len(hulls) > 1:
+		merged = []
+		for i in range(0, len(hulls) - 1, 2):
+			merged.append(merger.merge(*hulls[i], *hulls[i + 1]))
+		if len(hulls) % 2:
+			merged.append(hulls[-1])
+		hulls = merged
+	return vertices[np.asarray(hulls[0][0], dtype=np.intp)]
+
+# Below this many groups the group chains are built row by row with
+# _half_chain; the lockstep build costs a few NumPy calls per column, which
+# only pays off when each call covers many groups.
+LOCKSTEP_MIN_GROUPS = 16
+
+######################
+# Time Complexity O(1) array operations
+# Space Complexity O(1)
+######################
+def _turns_further(px, py, ax, ay, bx, by):
+	# True where, seen from p, b is further counterclockwise than a, or in the
+	# same direction but further away. This is the gift-wrapping comparison,
+	# and preferring the further point keeps collinear points off the hull.
+	# Works on scalars and elementwise on arrays.
+	turn = (ax - px) * (by - py) - (ay - py) * (bx - px)
+	further = ((bx - px) ** 2 + (by - py) ** 2) > ((ax - px) ** 2 + (ay - py) ** 2)
+	return (turn > 0) | ((turn == 0) & further)
+
+######################
+# Time Complexity O(mlogm) per group
+# Space Complexity O(n)
+######################
+def _group_chains(xs, ys, groups, sign):
+	# Monotone chains of every row of groups, a (g, m) array of point indices
+	# each sorted by (x, y); sign as in _half_chain. Returns the chains as a
+	# padded (g, m) index array and their lengths. With enough rows the chains
+	# are built in lockstep, one column at a time, each pop round vectorized
+	# over the rows that still need to pop.
+	g, m = groups.shape
+	chains = np.zeros((g, m), dtype=np.intp)
+	lengths = np.zeros(g, dtype=np.intp)
+	if g < LOCKSTEP_MIN_GROUPS:
+		xl, yl = xs.tolist(), ys.tolist()
+		for r, row in enumerate(groups.tolist()):
+			chain = _half_chain(xl, yl, row, sign)
+			chains[r, :len(chain)] = chain
+			lengths[r] = len(chain)
+		return chains, lengths
+
+	# column-major flat buffers: slot k of row r lives at k*g + r, so every
+	# column step reads and writes contiguous runs
+	gi = np.ascontiguousarray(groups.T)
+	gx, gy = xs[gi], ys[gi]
+	cx, cy = np.empty(m * g), np.empty(m * g)
+	ci = np.zeros(m * g, dtype=np.intp)
+	rows = np.arange(g)
+	for j in range(m):
+		px, py = gx[j], gy[j]
+		popping = np.flatnonzero(lengths >= 2)
+		while popping.size:
+			b = (lengths[popping] - 1) * g + popping
+			a = b - g
+			ax, ay = cx[a], cy[a]
+			turn = (cx[b] - ax) * (py[popping] - ay) - (cy[b] - ay) * (px[popping] - ax)
+			popping = popping[sign * turn >= 0]
+			lengths[popping] -= 1
+			popping = popping[lengths[popping] >= 2]
+		# a repeat of a lone first point replaces it rather than pairing with it
+		lengths[(lengths == 1) & (cx[:g] == px) & (cy[:g] == py)] = 0
+		slot = lengths * g + rows
+		cx[slot], cy[slot], ci[slot] = px, py, gi[j]
+		lengths += 1
+	return np.ascontiguousarray(ci.reshape(m, g).T), lengths
+
+######################
+# Time Complexity O(n) array operations
+# Space Complexity O(n)
+######################
+def _regroup(xs, ys, chains, lengths, r):
+	# Groups of r consecutive rows merged into one, keeping only the vertices
+	# of each row's chain (the rest of a group can never be on the merged
+	# chain), with each new row sorted by (x, y). Unused slots are filled with
+	# the row's first vertex, a repeat the chain build absorbs.
+	g = len(lengths)
+	width = int(lengths.max())
+	chains = chains[:, :width]
+	chains = np.where(np.arange(width) < lengths[:, None], chains, chains[:, :1])
+	extra = -g % r
+	if extra:
+		chains = np.concatenate((chains, np.repeat(chains[-1:], extra, axis=0)))
+	groups = chains.reshape(-1, r * width)
+	return np.take_along_axis(groups, np.lexsort((ys[groups], xs[groups]), axis=-1), axis=-1)
+
+######################
+# Time Complexity O(logm) array operations
+# Space Complexity O(g)
+######################
+def _wrap_point(xs, ys, chains, lengths, p, ascending):
+	# The gift-wrapping successor of p among all the group chains at once.
+	# Each chain is sorted by (x, y), ascending or descending, and the points
+	# past p in that order lie on one side of p, where "the next vertex turns
+	# further" is true up to the tangent and false after it. So every chain
+	# gets two binary searches, run in lockstep over all the chains: one for
+	# the first point past p, one for the tangent. The best tangent is then
+	# picked by a pairwise knockout. Returns the winning point index, or None
+	# if no chain has a point past p.
+	g, m = chains.shape
+	rows = np.arange(g)
+	px, py = xs[p], ys[p]
+
+	lo, hi = np.zeros(g, dtype=np.intp), lengths.copy()
+	while True:
+		active = lo < hi
+		if not active.any():
+			break
+		mid = np.minimum((lo + hi) // 2, m - 1)
+		mx, my = xs[chains[rows, mid]], ys[chains[rows, mid]]
+		if ascending:
+			past = (mx > px) | ((mx == px) & (my > py))
+		else:
+			past = (mx < px) | ((mx == px) & (my < py))
+		hi = np.where(active & past, mid, hi)
+		lo = np.where(active & ~past, mid + 1, lo)
+
+	found = lo < lengths
+	if not found.any():
+		return None
+	chains, rows = chains[found], np.arange(np.count_nonzero(found))
+	lo, hi = lo[found], lengths[found] - 1
+	while True:
+		active = lo < hi
+		if not active.any():
+			break
+		mid = (lo + hi) // 2
+		nxt = np.minimum(mid + 1, hi)
+		a, b = chains[rows, mid], chains[rows, nxt]
+		further = _turns_further(px, py, xs[a], ys[a], xs[b], ys[b])
+		lo = np.where(active & further, mid + 1, lo)
+		hi = np.where(active & ~further, mid, hi)
+
+	best = chains[rows, lo]
+	while len(best) > 1:
+		if len(best) % 2:
+			best = np.append(best, best[-1])
+		a, b = best[0::2], best[1::2]
+		best = np.where(_turns_further(px, py, xs[a], ys[a], xs[b], ys[b]), b, a)
+	return int(best[0])
+
+##########################
+# Time Complexity O(nlogh)
+# Space Complexity O(n)
+##########################
+def chan_hull(xs, ys, order=None):
+	# Chan's output-sensitive algorithm; needs no global sort, so convex_hull
+	# skips sort_points for it and order may be None (meaning every point).
+	# For m = 4, 16, 256, ... the points are cut into groups of m in input
+	# order, and each group is sorted on its own, O(n log m) in all, and gets
+	# its upper and lower chain, which together make up its closed hull. Then
+	# a gift-wrapping march of at most m steps is attempted: clockwise along
+	# the upper chains from the leftmost point to the rightmost, and back along
+	# the lower chains. Each step finds the tangent on every group hull by
+	# binary search, O((n/m) log m), so a round costs O(n log m) and the round
+	# with m >= h succeeds. Returns hull indices clockwise from the leftmost
+	# point, like the other modes.
+	points = np.arange(len(xs)) if order is None else np.asarray(order, dtype=np.intp)
+	n = len(points)
+	if n == 0:
+		return []
+	# lexicographic extremes in O(n): least x, then least y; greatest x, then greatest y
+	px, py = xs[points], ys[points]
+	at = points[px == px.min()]
+	leftmost = int(at[np.argmin(ys[at])])
+	at = points[px == px.max()]
+	rightmost = int(at[np.argmax(ys[at])])
+	if (xs[leftmost], ys[leftmost]) == (xs[rightmost], ys[rightmost]):
+		return [leftmost]
+
+	m = min(4, n)
+	g = -(-n // m)
+	# pad the last group with copies of its own first point
+	groups = np.empty(g * m, dtype=np.intp)
+	groups[:n] = points
+	groups[n:] = points[(g - 1) * m]
+	groups = groups.reshape(g, m)
+	groups = np.take_along_axis(groups, np.lexsort((ys[groups], xs[groups]), axis=-1), axis=-1)
+	uppers = _group_chains(xs, ys, groups, 1)
+	lowers = _group_chains(xs, ys, groups, -1)
+	while True:
+		# lower chains right to left for the march
+		chains, lengths = lowers
+		back = np.maximum(lengths[:, None] - 1 - np.arange(chains.shape[1]), 0)
+		backwards = np.take_along_axis(chains, back, axis=-1), lengths
+
+		hull = [leftmost]
+		p = leftmost
+		on_upper = True
+		while len(hull) <= m:
+			if on_upper and (xs[p], ys[p]) == (xs[rightmost], ys[rightmost]):
+				on_upper = False
+			q = _wrap_point(xs, ys, *(uppers if on_upper else backwards), p, on_upper)
+			if q is None or (xs[q], ys[q]) == (xs[leftmost], ys[leftmost]):
+				return hull
+			hull.append(q)
+			p = q
+
+		# too many hull vertices for this m: square it. The upper (lower) hull
+		# of a bigger group only has vertices from the upper (lower) chains of
+		# the groups it is made of, so only those are regrouped and re-chained.
+		r = -(-min(m * m, n) // m)
+		m = min(m * m, n)
+		uppers = _group_chains(xs, ys, _regroup(xs, ys, *uppers, r), 1)
+		lowers = _group_chains(xs, ys, _regroup(xs, ys, *lowers, r), -1)
+
+# Algorithm modes accepted by convex_hull, as name -> fn(xs, ys, order)
+# returning hull indices; order is the x-sorted, de-duplicated index array,
+# or None for the modes in SORT_FREE_ALGORITHMS
+ALGORITHMS = {
+	'divide_conquer': divide_and_conquer_hull,
+	'monotone_chain': monotone_chain_hull,
+	'parallel': parallel_hull,
+	'chan': chan_hull,
+}
+
+# Modes that do their own (output-sensitive) work instead of taking the global
+# x-sorted order; convex_hull passes them order=None and records no sort time
+SORT_FREE_ALGORITHMS = {'chan'}
+
+##########################
+# Time Complexity O(nlogn)
+# Space Complexity O(n)
+##########################
+def convex_hull(points, y=None, algorithm='divide_conquer', prefilter=False, stats=None, events=None):
+	# Hull of an (n, 2) coordinate array, or of separate x and y arrays.
+	# Returns the hull vertex indices (into the input) clockwise from the
+	# leftmost point. prefilter=True runs akl_toussaint_filter first. If a dict
+	# is passed as stats, the sort and hull times (in seconds) and the number
+	# of points culled by the prefilter are recorded in it. If a list is passed
+	# as events and the algorithm is 'divide_conquer', one (left hull, right
+	# hull, top tangent, bottom tangent) tuple per merge is appended to it, in
+	# input indices, so the recursion can be animated after the fact.
+	if algorithm not in ALGORITHMS:
+		raise ValueError('Unknown hull algorithm: {}'.format(algorithm))
+	xs, ys = as_coordinates(points, y)
+	if len(xs) == 0:
+		return np.zeros(0, dtype=np.intp)
+	t0 = time.perf_counter()
+	keep, culled = None, 0
+	if prefilter:
+		keep, culled = akl_toussaint_filter(xs, ys)
+		if culled:
+			xs, ys = xs[keep], ys[keep]
+		else:
+			keep = None
+	t1 = time.perf_counter()
+	order = None if algorithm in SORT_FREE_ALGORITHMS else sort_points(xs, ys)
+	t2 = time.perf_counter()
+	log = [] if events is not None and algorithm == 'divide_conquer' else None
+	if log is not None:
+		hull = divide_and_conquer_hull(xs, ys, order, log)
+	else:
+		hull = ALGORITHMS[algorithm](xs, ys, order)
+	t3 = time.perf_counter()
+	hull = np.asarray(hull, dtype=np.intp)
+	if keep is not None:
+		hull = keep[hull]
+	if log is not None:
+		events.extend(translate_events(log, order if keep is None else keep[order]))
+	if stats is not None:
+		stats['filter_time'] = t1 - t0
+		stats['culled'] = culled
+		stats['sort_time'] = t2 - t1
+		stats['hull_time'] = t3 - t2
+	return hull
+
+
+######################
+# Time Complexity O(1)
+# Space Complexity O(1)
+######################
+def _cross(a, b, c):
+	# orient() for (x, y) tuples
+	return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+######################
+# Time Complexity O(n)
+# Space Complexity O(n)
+######################
+def _tuple_chain(pts, sign):
+	# _half_chain for a sorted list of (x, y) tuples
+	chain = []
+	for p in pts:
+		while len(chain) >= 2 and sign * _cross(chain[-2], chain[-1], p) >= 0:
+			chain.pop()
+		chain.append(p)
+	return chain
+
+
+######################
+# Time Complexity O(k) for the k points in the slice
+# Space Complexity O(k)
+######################
+def _slice_range(points, lo=None, hi=None):
+	# The entries p of a sorted list with lo <= p <= hi; None means unbounded
+	i = bisect.bisect_left(points, lo) if lo is not None else 0
+	j = bisect.bisect_right(points, hi) if hi is not None else len(points)
+	return points[i:j]
+
+######################
+# Time Complexity O(logh + k) for the k vertices popped
+# Space Complexity O(1)
+######################
+def _chain_insert(chain, p, sign):
+	# Adds p to a monotone chain (sign as in _half_chain) of a point set;
+	# returns whether the chain changed
+	i = bisect.bisect_left(chain, p)
+	# inside the chain's x span and not strictly outside it: nothing changes
+	if 0 < i < len(chain) and sign * _cross(chain[i - 1], p, chain[i]) >= 0:
+		return False
+	chain.insert(i, p)
+	# pop the vertices p now hides, on each side
+	while i >= 2 and sign * _cross(chain[i - 2], chain[i - 1], p) >= 0:
+		del chain[i - 1]
+		i -= 1
+	while i + 2 < len(chain) and sign * _cross(p, chain[i + 1], chain[i + 2]) >= 0:
+		del chain[i + 1]
+	return True
+
+######################
+# Time Complexity O(logh) when p is not a vertex, otherwise the cost of
+# candidates(lo, hi) and the chain built from it
+# Space Complexity O(k) for the k candidates
+######################
+def _chain_delete(chain, p, sign, candidates):
+	# Removes p, already gone from the point set, from a monotone chain of that
+	# set. candidates(lo, hi) yields, in order, a superset of the points
+	# between lo and hi (None: unbounded) that can be chain vertices. Returns
+	# whether p was a vertex.
+	i = bisect.bisect_left(chain, p)
+	if i == len(chain) or chain[i] != p:
+		return False
+	# Removing p cannot take its neighbours off the hull, and every new
+	# vertex between them lies between them in (x, y) order
+	lo = chain[i - 1] if i > 0 else None
+	hi = chain[i + 1] if i + 1 < len(chain) else None
+	chain[max(i - 1, 0):i + 2] = _tuple_chain(candidates(lo, hi), sign)
+	return True
+
+
+class _SortedPoints:
+	# Sorted list of (x, y) tuples split into buckets of at most 2 * LOAD, so an
+	# insert or delete moves O(LOAD) list entries instead of O(n). Each bucket
+	# also keeps the upper and lower chains of its own points (chains[1][k] and
+	# chains[-1][k]), updated with the bucket, and a segment tree over the
+	# buckets caches the chains of runs of buckets, built from their
+	# children's chains. A hull vertex of the whole set is a vertex of the
+	# chain of every run that holds it, so a hull repair only reads O(log n)
+	# cached chains. Tree nodes are dropped (set to None) with their
+	# ancestors when a bucket chain changes and rebuilt when next read; a
+	# bucket split or removal drops the whole tree.
+
+	LOAD = 512
+
+	def __init__(self, points=()):
+		points = sorted(points)
+		self.buckets = [points[i:i + self.LOAD] for i in range(0, len(points), self.LOAD)]
+		self.maxes = [b[-1] for b in self.buckets]
+		self.chains = {sign: [_tuple_chain(b, sign) for b in self.buckets] for sign in (1, -1)}
+		self.trees = None
+
+	def __iter__(self):
+		for b in self.buckets:
+			yield from b
+
+	########################
+	# Time Complexity O(logn) amortized
+	# Space Complexity O(1)
+	########################
+	def add(self, p):
+		if not self.buckets:
+			self.buckets.append([p])
+			self.maxes.append(p)
+			for chains in self.chains.values():
+				chains.append([p])
+			self.trees = None
+			return
+		k = min(bisect.bisect_left(self.maxes, p), len(self.buckets) - 1)
+		b = self.buckets[k]
+		bisect.insort(b, p)
+		self.maxes[k] = b[-1]
+		if len(b) > 2 * self.LOAD:
+			halves = [b[:self.LOAD], b[self.LOAD:]]
+			self.buckets[k:k + 1] = halves
+			self.maxes[k:k + 1] = [b[self.LOAD - 1], b[-1]]
+			for sign, chains in self.chains.items():
+				chains[k:k + 1] = [_tuple_chain(half, sign) for half in halves]
+			self.trees = None
+			return
+		for sign, chains in self.chains.items():
+			if _chain_insert(chains[k], p, sign):
+				self._invalidate(sign, k)
+
+	########################
+	# Time Complexity O(logn), O(LOAD) when p is a vertex of its bucket's chains
+	# Space Complexity O(LOAD)
+	########################
+	def remove(self, p):
+		k = bisect.bisect_left(self.maxes, p)
+		b = self.buckets[k]
+		del b[bisect.bisect_left(b, p)]
+		if not b:
+			del self.buckets[k]
+			del self.maxes[k]
+			for chains in self.chains.values():
+				del chains[k]
+			self.trees = None
+			return
+		self.maxes[k] = b[-1]
+		for sign, chains in self.chains.items():
+			if _chain_delete(chains[k], p, sign, lambda lo, hi: _slice_range(b, lo, hi)):
+				self._invalidate(sign, k)
+
+	########################
+	# Time Complexity O(logn)
+	# Space Complexity O(1)
+	########################
+	def _invalidate(self, sign, k):
+		# Drops the cached chains above bucket k; a dropped node's ancestors
+		# are already dropped, so the walk stops at the first one
+		if self.trees is None:
+			return
+		tree = self.trees[sign]
+		i = (len(tree) // 2 + k) // 2
+		while i and tree[i] is not None:
+			tree[i] = None
+			i //= 2
+
+	########################
+	# Time Complexity O(k) for the k vertices of the children's chains
+	# Space Complexity O(k)
+	########################
+	def _node_chain(self, sign, i):
+		tree = self.trees[sign]
+		if tree[i] is None:
+			tree[i] = _tuple_chain(self._node_chain(sign, 2 * i) + self._node_chain(sign, 2 * i + 1), sign)
+		return tree[i]
+
+	########################
+	# Time Complexity O(logn + k) for the k vertices read, plus rebuilding
+	# dropped tree nodes
+	# Space Complexity O(k)
+	########################
+	def chain_range(self, sign, lo=None, hi=None):
+		# A sorted superset of the hull chain vertices v with lo <= v <= hi,
+		# where None means unbounded: the ends of the range from their bucket
+		# chains, the buckets in between from the O(log n) tree nodes that
+		# cover them
+		chains = self.chains[sign]
+		if not chains:
+			return []
+		k = bisect.bisect_left(self.maxes, lo) if lo is not None else 0
+		last = bisect.bisect_left(self.maxes, hi) if hi is not None else len(chains) - 1
+		if k == last:
+			return _slice_range(chains[k], lo, hi)
+		if self.trees is None:
+			size = 1 << (len(chains) - 1).bit_length()
+			self.trees = {}
+			for s, leaves in self.chains.items():
+				self.trees[s] = [None] * size + leaves + [[]] * (size - len(leaves))
+		size = len(self.trees[sign]) // 2
+		left, right = [], []
+		i, j = size + k + 1, size + last
+		while i < j:
+			if i & 1:
+				left += self._node_chain(sign, i)
+				i += 1
+			if j & 1:
+				j -= 1
+				right = self._node_chain(sign, j) + right
+			i //= 2
+			j //= 2
+		return _slice_range(chains[k], lo) + left + right + _slice_range(chains[last], None, hi)
+
+
+class DynamicHull:
+	# Convex hull of a changing point set. The points are kept sorted by (x, y)
+	# in buckets that carry their own chains (see _SortedPoints), next to the
+	# two monotone chains of the hull (upper: clockwise turns, lower:
+	# counterclockwise turns, both from the leftmost to the rightmost point).
+	# Each update fixes its bucket's chains and then repairs only the part of
+	# a hull chain it can affect:
+	#
+	#   insert: O(log n) if the point lands inside the hull; otherwise a
+	#           binary search plus popping the chain vertices it hides.
+	#   delete: O(log n) for a point that is not a hull vertex, or O(LOAD) if
+	#           it is a vertex of its bucket's chains; deleting a hull
+	#           vertex rebuilds the chain between its two neighbours from the
+	#           cached chains covering that span, not from every point.
+	#
+	# A hull vertex deletion therefore costs O(LOAD + log n * s), s being the
+	# size of the cached chains read, plus rebuilding the tree nodes that
+	# earlier updates dropped; none of it grows with the number of points
+	# between the vertex's neighbours. Points are (x, y) tuples; duplicates
+	# are counted.
+
+	def __init__(self, points=()):
+		self.counts = {}
+		for p in points:
+			p = (float(p[0]), float(p[1]))
+			self.counts[p] = self.counts.get(p, 0) + 1
+		self.points = _SortedPoints(self.counts)
+		self.upper = _tuple_chain(self.points, 1)
+		self.lower = _tuple_chain(self.points, -1)
+
+	def __len__(self):
+		return sum(self.counts.values())
+
+	def __contains__(self, point):
+		return (float(point[0]), float(point[1])) in self.counts
+
+	##########################
+	# Time Complexity O(logn) amortized
+	# Space Complexity O(1)
+	##########################
+	def insert(self, point):
+		p = (float(point[0]), float(point[1]))
+		if p in self.counts:
+			self.counts[p] += 1
+			return
+		self.counts[p] = 1
+		self.points.add(p)
+		_chain_insert(self.upper, p, 1)
+		_chain_insert(self.lower, p, -1)
+
+	##########################
+	# Time Complexity O(logn), O(LOAD + k logn) when a hull vertex is removed
+	# and the cached chains read have k vertices each
+	# Space Complexity O(LOAD + k)
+	##########################
+	def delete(self, point):
+		p = (float(point[0]), float(point[1]))
+		count = self.counts.get(p)
+		if count is None:
+			raise KeyError(point)
+		if count > 1:
+			self.counts[p] = count - 1
+			return
+		del self.counts[p]
+		self.points.remove(p)
+		_chain_delete(self.upper, p, 1, lambda lo, hi: self.points.chain_range(1, lo, hi))
+		_chain_delete(self.lower, p, -1, lambda lo, hi: self.points.chain_range(-1, lo, hi))
+
+	######################
+	# Time Complexity O(h)
+	# Space Complexity O(h)
+	######################
+	def hull(self):
+		# Hull vertices as (x, y) tuples, clockwise from the leftmost point
+		return self.upper + self.lower[-2:0:-1]
+
+
+# Points read per chunk by streaming_hull
+CHUNK_POINTS = 1 << 20
+
+######################
+# Time Complexity O(n)
+# Space Complexity O(chunk)
+######################
+def iter_coordinate_chunks(source, chunk_size=CHUNK_POINTS):
+	# Yields (k, 2) float64 arrays with k <= chunk_size from one of:
+	#   - a path to a text file with one "x y" or "x,y" point per line
+	#   - an iterable of (x, y) pairs
+	#   - an iterable of (k, 2) arrays, which are re-cut to chunk_size
+	if isinstance(source, (str, os.PathLike)):
+		with open(source) as f:
+			while True:
+				lines = list(itertools.islice(f, chunk_size))
+				if not lines:
+					return
+				fields = ''.join(lines).replace(',', ' ').split()
+				yield np.array(fields, dtype=np.float64).reshape(-1, 2)
+	pending = []
+	for item in source:
+		if np.ndim(item) == 2:
+			if pending:
+				yield np.array(pending, dtype=np.float64)
+				pending = []
+			block = np.asarray(item, dtype=np.float64)
+			for i in range(0, len(block), chunk_size):
+				yield block[i:i + chunk_size]
+		else:
+			pending.append(item)
+			if len(pending) == chunk_size:
+				yield np.array(pending, dtype=np.float64)
+				pending = []
+	if pending:
+		yield np.array(pending, dtype=np.float64)
+
+##########################
+# Time Complexity O(nlogn)
+# Space Complexity O(h + chunk)
+##########################
+def streaming_hull(source, chunk_size=CHUNK_POINTS, stats=None):
+	# Hull of a point feed too large to hold in memory. `source` is anything
+	# iter_coordinate_chunks accepts. Only the running hull and one chunk are
+	# held at a time: each chunk is culled and solved on its own, and its hull
+	# vertices are then solved together with the running hull's. Returns the
+	# hull vertices as an (h, 2) array, clockwise from the leftmost point. If a
+	# dict is passed as stats, the number of points and chunks read is recorded.
+	running = np.zeros((0, 2), dtype=np.float64)
+	n_points = n_chunks = 0
+	for chunk in iter_coordinate_chunks(source, chunk_size):
+		n_points += len(chunk)
+		n_chunks += 1
+		if len(chunk) == 0:
+			continue
+		chunk_hull = chunk[convex_hull(chunk, algorithm='monotone_chain', prefilter=True)]
+		candidates = np.concatenate((running, chunk_hull))
+		running = candidates[convex_hull(candidates, algorithm='monotone_chain')]
+	if stats is not None:
+		stats['points'] = n_points
+		stats['chunks'] = n_chunks
+	return running
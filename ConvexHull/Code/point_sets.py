@@ -0,0 +1,65 @@
+# Qt-free point generators shared by the GUI (Proj2GUI.newPoints) and the
+# headless benchmarks (hull_bench.py). Every generator takes a point count and
+# a numpy Generator and returns an (n, 2) float64 array with distinct x values,
+# all inside the disc of radius MAX_R.
+
+import numpy as np
+
+
+MAX_R = 0.98
+WIDTH = 1.0
+HEIGHT = 1.0
+
+# Candidates are drawn in batches of at least this many, so small requests
+# don't loop once per point
+MIN_BATCH = 1024
+
+
+def _rejection_sample(n, rng, draw):
+	# draw(m, rng) returns up to m accepted candidate points. Batches are drawn
+	# until n points with distinct x values have been collected; duplicates
+	# after the first are dropped, as the GUI's unique_xvals dict did.
+	pts = np.empty((0, 2))
+	while len(pts) < n:
+		m = max(MIN_BATCH, 2 * (n - len(pts)))
+		pts = np.concatenate((pts, draw(m, rng)))
+		_, first = np.unique(pts[:, 0], return_index=True)
+		if len(first) < len(pts):
+			pts = pts[np.sort(first)]
+	return pts[:n] * (WIDTH, HEIGHT)
+
+def _disc(m, rng):
+	xy = rng.uniform(-1.0, 1.0, (m, 2))
+	return xy[(xy ** 2).sum(axis=1) <= MAX_R ** 2]
+
+def _ball(m, rng):
+	xyz = rng.uniform(-1.0, 1.0, (m, 3))
+	return xyz[(xyz ** 2).sum(axis=1) <= MAX_R ** 2, :2]
+
+def _gaussian(m, rng):
+	xy = rng.normal(0.0, 0.25, (m, 2))
+	return xy[(xy ** 2).sum(axis=1) <= MAX_R ** 2]
+
+# Uniform in the disc of radius MAX_R
+def uniform_points(n, rng):
+	return _rejection_sample(n, rng, _disc)
+
+# Uniform in the ball of radius MAX_R, projected onto the xy plane
+def sphere_points(n, rng):
+	return _rejection_sample(n, rng, _ball)
+
+# Gaussian around the origin (sigma 0.25), cut off at radius MAX_R
+def gaussian_points(n, rng):
+	return _rejection_sample(n, rng, _gaussian)
+
+DISTRIBUTIONS = {
+	'uniform': uniform_points,
+	'sphere': sphere_points,
+	'gaussian': gaussian_points,
+}
+
+def generate_points(distribution, n, seed=None):
+	# n points from one of DISTRIBUTIONS; seed=None seeds from the OS
+	if distribution not in DISTRIBUTIONS:
+		raise ValueError('Unknown point distribution: {}'.format(distribution))
+	return DISTRIBUTIONS[distribution](n, np.random.default_rng(seed))
@@ -1,26 +1,126 @@
 import random
 import math
+import itertools
+import os
+import dbm
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 
+# NumPy is optional here; without it the vectorized batch path is just skipped.
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def prime_test(N, k):
-    # This is main function, that is connected to the Test button. You don't need to touch it.
-    return fermat(N,k), miller_rabin(N,k)
+
+def prime_test(N, k, mode='random', cache=None):
+    # This is main function, that is connected to the Test button.
+    # mode='random' runs both tests with k random witnesses.
+    # mode='deterministic' answers N < 2^64 exactly with a fixed Miller-Rabin base
+    # set and no RNG; both slots get that exact verdict. Larger N fall back to 'random'.
+    # mode='bpsw' runs Baillie-PSW at a fixed cost regardless of k; both slots
+    # get its verdict.
+    # cache is an optional VerdictCache consulted before any work is done.
+    if mode not in ('random', 'deterministic', 'bpsw'):
+        raise ValueError('Unknown primality mode: {}'.format(mode))
+    exact = mode == 'deterministic' and N < DETERMINISTIC_LIMIT
+    if exact:
+        confidence = EXACT
+    elif mode == 'bpsw':
+        confidence = BPSW_CONFIDENCE
+    else:
+        confidence = k
+    if cache is not None:
+        verdicts = cache.lookup(N, confidence)
+        if verdicts is not None:
+            return verdicts
+    if exact:
+        verdict = miller_rabin_deterministic(N)
+        verdicts = verdict, verdict
+    elif mode == 'bpsw':
+        verdict = baillie_psw(N)
+        verdicts = verdict, verdict
+    else:
+        verdicts = fermat(N,k), miller_rabin(N,k)
+    if cache is not None:
+        cache.store(N, confidence, verdicts)
+    return verdicts
+
+# Exponents shorter than this many bits go through plain square-and-multiply;
+# longer ones use the sliding-window engine, where the precomputed table pays off.
+WINDOW_THRESHOLD_BITS = 256
 
 # TIME COMPLEXITY: O(n^3)
-# SPACE COMPLEXITY: O(n^2)
+# SPACE COMPLEXITY: O(n)
 def mod_exp(x, y, N):
-    # If the exponent is 0, then 1 can be returned and no calculations necessary
+    # Exact integer x^y mod N. Picks the engine by the size of the exponent.
+    if y.bit_length() >= WINDOW_THRESHOLD_BITS:
+        return mod_exp_window(x, y, N)
+    return mod_exp_binary(x, y, N)
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(n)
+def mod_exp_binary(x, y, N):
+    # Left-to-right square-and-multiply. Everything stays an int, so there is
+    # no precision loss, and it loops once per exponent bit instead of recursing.
+    if N == 1:
+        return 0
+    x %= N
+    z = 1
+    for bit in bin(y)[2:]:
+        z = (z * z) % N
+        if bit == '1':
+            z = (z * x) % N
+    return z
+
+# Returns the window size that minimizes squarings + multiplications for an
+# exponent of the given bit length.
+def _window_size(bits):
+    if bits <= 64:
+        return 3
+    if bits <= 512:
+        return 4
+    if bits <= 2048:
+        return 5
+    return 6
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(2^w * n)
+def mod_exp_window(x, y, N, w=None):
+    # Sliding-window exponentiation. Only odd powers x^1, x^3, ..., x^(2^w - 1)
+    # are precomputed, and runs of zero bits are skipped with plain squarings,
+    # so roughly n/(w+1) multiplications are done instead of n/2.
+    if N == 1:
+        return 0
     if y == 0:
         return 1
-    # Recursively call mod_exp for x and half of
-    # the exponent y.
-    z = mod_exp(x, math.floor(y/2), N)
-    # If y is even, then return z squared mod N
-    if (y % 2) == 0:
-        return math.pow(z, 2) % N
-    # If y is odd, return x times z squared mod N
-    else:
-        return (x * (math.pow(z, 2))) % N
+    if w is None:
+        w = _window_size(y.bit_length())
+    x %= N
+    # Table of odd powers: table[i] = x^(2i+1) mod N || TIME COMPLEXITY: O(2^w)
+    x2 = (x * x) % N
+    table = [x]
+    for i in range(1, 1 << (w - 1)):
+        table.append((table[-1] * x2) % N)
+
+    bits = bin(y)[2:]
+    z = 1
+    i = 0
+    n = len(bits)
+    while i < n:
+        if bits[i] == '0':
+            z = (z * z) % N
+            i += 1
+            continue
+        # Take the longest window of at most w bits that ends in a 1.
+        j = min(i + w, n)
+        while bits[j - 1] == '0':
+            j -= 1
+        for _ in range(j - i):
+            z = (z * z) % N
+        z = (z * table[int(bits[i:j], 2) >> 1]) % N
+        i = j
+    return z
 
 # TIME COMPLEXITY: O(1)
 # SPACE COMPLEXITY: O(1)
@@ -32,9 +132,72 @@ def fprobability(k):
 def mprobability(k):
     return 1.00 - (1 / (math.pow(4, k)))
 
+# Memory budget of one sieve segment, in bytes. Each byte stands for one odd number.
+SEGMENT_BYTES = 1 << 20
+
+# TIME COMPLEXITY: O((hi - lo) log log hi + sqrt(hi))
+# SPACE COMPLEXITY: O(sqrt(hi) + segment_bytes)
+def _sieve_segments(lo, hi, segment_bytes):
+    # Yields (start, flags) for consecutive windows of odd numbers covering
+    # [max(lo, 3), hi], where flags[i] == 1 iff start + 2i is prime.
+    # Only the base primes up to sqrt(hi) are kept for the whole run.
+    base = small_primes(math.isqrt(hi) + 1)[1:]
+    start = max(lo, 3) | 1
+    while start <= hi:
+        end = min(start + 2 * (segment_bytes - 1), hi)
+        length = (end - start) // 2 + 1
+        flags = bytearray([1]) * length
+        for p in base:
+            if p * p > end:
+                break
+            # First odd multiple of p in the window that is not p itself
+            m = max(p * p, -(-start // p) * p)
+            if m % 2 == 0:
+                m += p
+            i = (m - start) // 2
+            flags[i::p] = bytes(len(range(i, length, p)))
+        yield start, flags
+        start += 2 * length
+
+# TIME COMPLEXITY: O((hi - lo) log log hi + sqrt(hi))
+# SPACE COMPLEXITY: O(sqrt(hi) + segment_bytes)
+def primes_in_range(lo, hi, segment_bytes=SEGMENT_BYTES):
+    # Generator of every prime p with lo <= p <= hi, in increasing order,
+    # from a segmented sieve of Eratosthenes. Exact; no random witnesses.
+    if hi < 2 or hi < lo:
+        return
+    if lo <= 2:
+        yield 2
+    for start, flags in _sieve_segments(lo, hi, segment_bytes):
+        yield from itertools.compress(range(start, start + 2 * len(flags), 2), flags)
+
+# TIME COMPLEXITY: O((hi - lo) log log hi + sqrt(hi))
+# SPACE COMPLEXITY: O(sqrt(hi) + segment_bytes)
+def count_primes_in_range(lo, hi, segment_bytes=SEGMENT_BYTES):
+    # Number of primes p with lo <= p <= hi, without materializing them.
+    if hi < 2 or hi < lo:
+        return 0
+    total = 1 if lo <= 2 else 0
+    for start, flags in _sieve_segments(lo, hi, segment_bytes):
+        total += flags.count(1)
+    return total
+
+# Handles the N values the random tests cannot, since randint(2, N-1) needs N > 3.
+def _small_case(N):
+    if N < 2:
+        return 'composite'
+    if N < 4:
+        return 'prime'
+    if N % 2 == 0:
+        return 'composite'
+    return None
+
 # TIME COMPLEXITY: O(n^3)
-# SPACE COMPLEXITY: O(n^2)
+# SPACE COMPLEXITY: O(n)
 def fermat(N,k):
+    small = _small_case(N)
+    if small is not None:
+        return small
     randvals = []
     # For k amount of times, generate a random integer from 2 -> N-1
     # and put it into the randvals list. || TIME COMPLEXITY: O(k)
@@ -49,32 +212,573 @@ def fermat(N,k):
     # random numbers passed and that the number is prime.
     return 'prime'
 
-# TIME COMPLEXITY: O(n^4)
-# SPACE COMPLEXITY: O(n^3)
+# Write N-1 as 2^s * d with d odd. || TIME COMPLEXITY: O(n)
+def _decompose(N):
+    d = N - 1
+    s = 0
+    while (d % 2) == 0:
+        d //= 2
+        s += 1
+    return d, s
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(n)
+def _strong_probable_prime(N, a, d, s):
+    # One Miller-Rabin round for witness a. Start from a^d and square s-1 times.
+    # Only one exponentiation per witness is needed, since every later term is
+    # the square of the one before it.
+    x = mod_exp(a, d, N) # TIME COMPLEXITY: O(n^3)
+    if x == 1 or x == N - 1:
+        return True
+    for _ in range(s - 1): # TIME COMPLEXITY: O(n) squarings
+        x = (x * x) % N
+        if x == N - 1:
+            return True
+    # Never reached -1, so a is a witness that N is composite.
+    return False
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(n)
 def miller_rabin(N,k):
+    small = _small_case(N)
+    if small is not None:
+        return small
     randvals = []
     # For k amount of times, generate a random integer from 2 -> N-1 and put it
     # into the randvals list. || TIME COMPLEXITY: O(k)
     for i in range(k):
         randvals.insert(i, random.randint(2, N - 1))
 
+    d, s = _decompose(N)
     for a in randvals:
-        # For each of the randvals, calculate the mod_exp of it with N-1. If this does not equal 1,
-        # then the number is composite. || TIME COMPLEXITY: O(k)
-        x = mod_exp(a, N - 1, N) # TIME COMPLEXITY: O(n^3)
-        # If the mod_exp of the randval and N-1 is not 1, return composite.
-        if x != 1:
+        if not _strong_probable_prime(N, a, d, s):
             return 'composite'
-        # This exp value is for tracking the changing exponent which starts as N-1
-        exp = N - 1
-        # Continue this process while exp is even, and each loop
-        # divide exp by 2.
-        while (exp % 2) == 0: # TIME COMPLEXITY: O(n)
-            exp /= 2
-            # Calculate x to the exp power mod N. If this does not equal -1 or 1,
-            # then the number is composite. || TIME COMPLEXITY: O(n^3) <----
-            x = mod_exp(x, exp, N)
-            if x != -1 and x != 1:
-                return 'composite'
     # If the above loop doesn't trigger any returns, then the number must be prime.
     return 'prime'
+
+# Every N below 2^64 is answered exactly by the Miller-Rabin bases below.
+DETERMINISTIC_LIMIT = 1 << 64
+
+# (bound, bases): the smallest published witness set proven for every N < bound,
+# in increasing bound order (Jaeschke, Sinclair, Feitsma's base-2 pseudoprime
+# list; collected at miller-rabin.appspot.com). Bases may exceed N; they are
+# reduced mod N, and one that is a multiple of N is skipped.
+DETERMINISTIC_BASES = [
+    (341531, (9345883071009581737,)),
+    (1050535501, (336781006125, 9639812373923155)),
+    (350269456337, (4230279247111683200, 14694767155120705706, 16641139526367750375)),
+    (55245642489451, (2, 141889084524735, 1199124725622454117, 11096072698276303650)),
+    (7999252175582851, (2, 4130806001517, 149795463772692060, 186635894390467037, 3967304179347715805)),
+    (585226005592931977, (2, 123635709730000, 9233062284813009, 43835965440333360, 761179012939631437,
+                          1263739024124850375)),
+    (DETERMINISTIC_LIMIT, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+]
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(1)
+def deterministic_bases(N):
+    # Returns the minimal proven base set for N, or None if N >= 2^64.
+    for bound, bases in DETERMINISTIC_BASES:
+        if N < bound:
+            return bases
+    return None
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(n)
+def miller_rabin_deterministic(N):
+    # Exact for N < 2^64. Uses at most 7 exponentiations and never touches the RNG.
+    small = _small_case(N)
+    if small is not None:
+        return small
+    bases = deterministic_bases(N)
+    if bases is None:
+        raise ValueError('No deterministic base set for N >= 2^64')
+    d, s = _decompose(N)
+    for a in bases:
+        a %= N
+        # A base that is a multiple of N says nothing about N; skip it.
+        if a == 0:
+            continue
+        if not _strong_probable_prime(N, a, d, s):
+            return 'composite'
+    return 'prime'
+
+# Confidence a Baillie-PSW 'prime' is recorded at in a VerdictCache. There is
+# no proven error bound, but no counterexample is known, so it is ranked above
+# any k a caller would realistically ask the random tests for.
+BPSW_CONFIDENCE = 64
+
+# TIME COMPLEXITY: O(n^2)
+# SPACE COMPLEXITY: O(1)
+def jacobi(a, n):
+    # Jacobi symbol (a/n) for odd n > 0, by quadratic reciprocity
+    a %= n
+    result = 1
+    while a != 0:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(n)
+def strong_lucas(N):
+    # Strong Lucas probable-prime test with Selfridge's parameters: D is the first
+    # of 5, -7, 9, -11, ... with (D/N) = -1, P = 1 and Q = (1 - D)/4.
+    # N must be odd and greater than 2.
+    # A perfect square has no such D, and the search for one would never end.
+    if math.isqrt(N) ** 2 == N:
+        return 'composite'
+    D = 5
+    while True:
+        j = jacobi(D, N)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != N:
+            return 'composite'
+        D = -D - 2 if D > 0 else -D + 2
+    P = 1
+    Q = (1 - D) // 4
+
+    # N+1 = 2^s * d with d odd
+    d = N + 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    # Left-to-right ladder for U_d, V_d and Q^d, all mod N. Halving mod N is
+    # done by adding N to odd values first, since N is odd.
+    U, V, Qk = 1, P, Q % N
+    for bit in bin(d)[3:]:
+        U = (U * V) % N
+        V = (V * V - 2 * Qk) % N
+        Qk = (Qk * Qk) % N
+        if bit == '1':
+            U, V = (P * U + V) % N, (D * U + P * V) % N
+            U = (U + N if U % 2 else U) // 2
+            V = (V + N if V % 2 else V) // 2
+            Qk = (Qk * Q) % N
+
+    if U == 0 or V == 0:
+        return 'prime'
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % N
+        Qk = (Qk * Qk) % N
+        if V == 0:
+            return 'prime'
+    return 'composite'
+
+# TIME COMPLEXITY: O(n^3)
+# SPACE COMPLEXITY: O(n)
+def baillie_psw(N):
+    # Baillie-PSW: trial division, one strong base-2 Miller-Rabin round, then a
+    # strong Lucas test. Fixed cost, and no composite is known to pass it.
+    small = _small_case(N)
+    if small is not None:
+        return small
+    for p in SMALL_PRIMES[:50]:
+        if N % p == 0:
+            return 'prime' if N == p else 'composite'
+    d, s = _decompose(N)
+    if not _strong_probable_prime(N, 2, d, s):
+        return 'composite'
+    return strong_lucas(N)
+
+# The vectorized tests keep every lane below this, so a product of two
+# residues stays below 2^62 and never overflows a uint64.
+VECTOR_LIMIT = 1 << 31
+# Smaller batches are not worth the NumPy call overhead.
+VECTOR_MIN_BATCH = 64
+# Deterministic Miller-Rabin bases that cover every N < VECTOR_LIMIT
+VECTOR_BASES = (2, 7, 61)
+
+# TIME COMPLEXITY: O(n^3) array operations of length m
+# SPACE COMPLEXITY: O(m)
+def _mod_exp_vectorized(x, y, N):
+    # Right-to-left square-and-multiply applied to every lane at once. Lanes
+    # have their own exponents, so a lane only multiplies where its bit is set.
+    z = np.ones_like(N)
+    x = x % N
+    y = y.copy()
+    while y.any():
+        odd = (y & 1).astype(bool)
+        z = np.where(odd, (z * x) % N, z)
+        x = (x * x) % N
+        y >>= 1
+    return z
+
+# Random witnesses in [2, N-1], one per lane, drawn through the random module's
+# state so random.seed() makes the vectorized tests reproducible too
+def _random_witnesses(N):
+    rng = np.random.default_rng(random.getrandbits(64))
+    return rng.integers(2, N, dtype=np.uint64)
+
+# TIME COMPLEXITY: O(k * n^3) array operations of length m
+# SPACE COMPLEXITY: O(m)
+def fermat_vectorized(Ns, k):
+    # Fermat test over a uint64 array of odd N with 3 < N < VECTOR_LIMIT.
+    # Returns a bool array, True where all k random witnesses passed.
+    Ns = np.asarray(Ns, dtype=np.uint64)
+    prime = np.ones(Ns.shape, dtype=bool)
+    for _ in range(k):
+        prime &= _mod_exp_vectorized(_random_witnesses(Ns), Ns - 1, Ns) == 1
+    return prime
+
+# TIME COMPLEXITY: O(k * n^3) array operations of length m
+# SPACE COMPLEXITY: O(m)
+def miller_rabin_vectorized(Ns, k, bases=None):
+    # Miller-Rabin over a uint64 array of odd N with 3 < N < VECTOR_LIMIT.
+    # Uses k random witnesses per lane, or the given fixed bases for every lane.
+    # Returns a bool array, True where no witness proved N composite.
+    Ns = np.asarray(Ns, dtype=np.uint64)
+    # N-1 = 2^s * d with d odd, per lane
+    d = Ns - 1
+    s = np.zeros(Ns.shape, dtype=np.uint64)
+    even = (d & 1) == 0
+    while even.any():
+        d[even] >>= 1
+        s[even] += 1
+        even = (d & 1) == 0
+    max_s = int(s.max()) if s.size else 0
+
+    prime = np.ones(Ns.shape, dtype=bool)
+    if bases is None:
+        witnesses = (_random_witnesses(Ns) for _ in range(k))
+    else:
+        witnesses = (np.full(Ns.shape, a, dtype=np.uint64) % Ns for a in bases)
+    for a in witnesses:
+        x = _mod_exp_vectorized(a, d, Ns)
+        # A base that is a multiple of N says nothing about N.
+        passed = (a == 0) | (x == 1) | (x == Ns - 1)
+        for r in range(1, max_s):
+            x = (x * x) % Ns
+            passed |= (x == Ns - 1) & (r < s)
+        prime &= passed
+    return prime
+
+# TIME COMPLEXITY: O(k * n^3) array operations of length m
+# SPACE COMPLEXITY: O(m)
+def prime_test_vectorized(Ns, k, mode='random'):
+    # Vectorized prime_test_many for 0 <= N < VECTOR_LIMIT; same verdict bytes.
+    # Trial division is one % per small prime over the whole batch.
+    Ns = np.asarray(Ns, dtype=np.uint64)
+    both = FERMAT_PRIME | MR_PRIME
+    verdicts = np.zeros(Ns.shape, dtype=np.uint8)
+    small = Ns < TRIAL_DIVISION_LIMIT
+    verdicts[small] = [both if int(N) in SMALL_PRIME_SET else COMPOSITE for N in Ns[small]]
+    undecided = ~small
+    for p in SMALL_PRIMES:
+        undecided &= (Ns % p) != 0
+    # No factor below the limit and N < limit^2 means N is prime.
+    sure = undecided & (Ns < TRIAL_DIVISION_LIMIT * TRIAL_DIVISION_LIMIT)
+    verdicts[sure] = both
+    undecided &= ~sure
+
+    rest = Ns[undecided]
+    if rest.size:
+        if mode in ('deterministic', 'bpsw'):
+            # Every lane is below VECTOR_LIMIT, so the fixed bases are already exact.
+            mr = miller_rabin_vectorized(rest, 0, VECTOR_BASES)
+            fermat_ok = mr
+        elif mode == 'random':
+            fermat_ok = fermat_vectorized(rest, k)
+            mr = miller_rabin_vectorized(rest, k)
+        else:
+            raise ValueError('Unknown primality mode: {}'.format(mode))
+        verdicts[undecided] = np.where(fermat_ok, FERMAT_PRIME, 0) | np.where(mr, MR_PRIME, 0)
+    return bytearray(verdicts.tobytes())
+
+# Bit flags for the compact verdicts returned by prime_test_many.
+# A verdict byte of FERMAT_PRIME | MR_PRIME means both tests said 'prime'.
+COMPOSITE = 0
+FERMAT_PRIME = 1
+MR_PRIME = 2
+
+# TIME COMPLEXITY: O(n log log n)
+# SPACE COMPLEXITY: O(n)
+def small_primes(limit):
+    # Plain sieve of Eratosthenes; returns every prime < limit.
+    if limit < 3:
+        return []
+    sieve = bytearray([1]) * limit
+    sieve[0] = sieve[1] = 0
+    for p in range(2, math.isqrt(limit - 1) + 1):
+        if sieve[p]:
+            sieve[p*p::p] = bytes(len(range(p*p, limit, p)))
+    return [p for p in range(limit) if sieve[p]]
+
+# Candidates are trial-divided by every prime below this before any exponentiation.
+TRIAL_DIVISION_LIMIT = 2000
+SMALL_PRIMES = small_primes(TRIAL_DIVISION_LIMIT)
+SMALL_PRIME_SET = frozenset(SMALL_PRIMES)
+# Product of SMALL_PRIMES, so one gcd does all the trial divisions at once.
+PRIMORIAL = math.prod(SMALL_PRIMES)
+
+# TIME COMPLEXITY: O(n^2)
+# SPACE COMPLEXITY: O(1)
+def trial_division(N):
+    # Returns 'prime' or 'composite' when small factors settle it, else None.
+    if N < TRIAL_DIVISION_LIMIT:
+        return 'prime' if N in SMALL_PRIME_SET else 'composite'
+    if math.gcd(N, PRIMORIAL) != 1:
+        return 'composite'
+    # No factor below the limit and N < limit^2, so N has no factor at all.
+    if N < TRIAL_DIVISION_LIMIT * TRIAL_DIVISION_LIMIT:
+        return 'prime'
+    return None
+
+# Packs a (fermat, miller_rabin) verdict pair into one byte
+def encode_verdict(fermat_result, mr_result):
+    return (FERMAT_PRIME if fermat_result == 'prime' else 0) | (MR_PRIME if mr_result == 'prime' else 0)
+
+# Unpacks one byte back into the (fermat, miller_rabin) pair that prime_test returns
+def decode_verdict(v):
+    return ('prime' if v & FERMAT_PRIME else 'composite'), ('prime' if v & MR_PRIME else 'composite')
+
+# TIME COMPLEXITY: O(m * k * n^3) for m candidates, far less when most die in trial division
+# SPACE COMPLEXITY: O(m)
+def prime_test_many(candidates, k, mode='random', cache=None):
+    # Batch version of prime_test. Returns a bytearray with one verdict byte per
+    # candidate, in input order (see encode_verdict/decode_verdict). Candidates
+    # with a factor below TRIAL_DIVISION_LIMIT never reach the exponentiations.
+    # Large enough batches of word-size N go through prime_test_vectorized,
+    # which does not consult the cache.
+    candidates = list(candidates)
+    if (np is not None and len(candidates) >= VECTOR_MIN_BATCH
+            and 0 <= min(candidates) and max(candidates) < VECTOR_LIMIT):
+        return prime_test_vectorized(candidates, k, mode)
+    verdicts = bytearray()
+    both = FERMAT_PRIME | MR_PRIME
+    for N in candidates:
+        settled = trial_division(N)
+        if settled is not None:
+            verdicts.append(both if settled == 'prime' else COMPOSITE)
+        else:
+            verdicts.append(encode_verdict(*prime_test(N, k, mode, cache)))
+    return verdicts
+
+# Default number of candidates shipped to a worker process per task
+PARALLEL_CHUNKSIZE = 256
+
+# Runs in each worker at startup. Forked workers inherit the parent's RNG state,
+# so without reseeding every worker would draw the same witnesses.
+def _init_worker():
+    random.seed()
+
+def _screen_chunk(chunk, k, mode):
+    return prime_test_many(chunk, k, mode)
+
+# TIME COMPLEXITY: O(m * k * n^3 / workers)
+# SPACE COMPLEXITY: O(workers * chunksize)
+def iter_prime_test_parallel(candidates, k, mode='random', workers=None, chunksize=PARALLEL_CHUNKSIZE):
+    # Generator of (N, verdict byte) pairs, in input order, with the screening
+    # spread over a process pool. At most 2 chunks per worker are in flight, so
+    # the candidate stream may be unbounded. Closing the generator early cancels
+    # every chunk that has not started yet.
+    candidates = iter(candidates)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    in_flight = deque()
+    try:
+        while True:
+            while len(in_flight) < max_in_flight:
+                chunk = list(itertools.islice(candidates, chunksize))
+                if not chunk:
+                    break
+                in_flight.append((chunk, executor.submit(_screen_chunk, chunk, k, mode)))
+            if not in_flight:
+                return
+            chunk, future = in_flight.popleft()
+            yield from zip(chunk, future.result())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+# TIME COMPLEXITY: O(m * k * n^3 / workers)
+# SPACE COMPLEXITY: O(m)
+def prime_test_parallel(candidates, k, mode='random', workers=None, chunksize=PARALLEL_CHUNKSIZE):
+    # Process-pool version of prime_test_many; same bytearray result, same order.
+    return bytearray(v for N, v in iter_prime_test_parallel(candidates, k, mode, workers, chunksize))
+
+# TIME COMPLEXITY: O(m * k * n^3 / workers) for the m candidates consumed
+# SPACE COMPLEXITY: O(count + workers * chunksize)
+def first_primes_parallel(candidates, count, k, mode='random', workers=None, chunksize=PARALLEL_CHUNKSIZE):
+    # Returns the first `count` candidates (in input order) that Miller-Rabin
+    # calls prime, and stops the pool as soon as they are known.
+    found = []
+    if count <= 0:
+        return found
+    results = iter_prime_test_parallel(candidates, k, mode, workers, chunksize)
+    try:
+        for N, v in results:
+            if v & MR_PRIME:
+                found.append(N)
+                if len(found) == count:
+                    break
+    finally:
+        results.close()
+    return found
+
+# Number of odd candidates sieved together when hunting for the next prime
+PRIME_WINDOW = 4096
+# Miller-Rabin rounds for generated primes above 2^64 (error < 4^-40)
+GENERATE_ROUNDS = 40
+
+# Final check for sieve survivors: exact below 2^64, k random rounds above
+def _survivor_is_prime(N, k):
+    if N < DETERMINISTIC_LIMIT:
+        return miller_rabin_deterministic(N) == 'prime'
+    d, s = _decompose(N)
+    for _ in range(k):
+        if not _strong_probable_prime(N, random.randint(2, N - 2), d, s):
+            return False
+    return True
+
+# TIME COMPLEXITY: O(n^4 / log n) per prime found
+# SPACE COMPLEXITY: O(PRIME_WINDOW + len(SMALL_PRIMES))
+def iter_primes_from(n, k=GENERATE_ROUNDS, window=PRIME_WINDOW):
+    # Generator of the (probable) primes >= n in increasing order.
+    # Odd candidates are sieved a window at a time against SMALL_PRIMES. The
+    # residue of the window start modulo each small prime is computed once and
+    # then moved forward by addition, so no candidate is ever divided. Only the
+    # survivors get Miller-Rabin.
+    if n <= 2:
+        yield 2
+        n = 3
+    start = n | 1
+    odd_primes = SMALL_PRIMES[1:]
+    residues = [start % p for p in odd_primes]
+    step = 2 * window
+    while True:
+        flags = bytearray([1]) * window
+        for j, p in enumerate(odd_primes):
+            # start + 2i == 0 mod p  <=>  i == -r * 2^-1 mod p
+            i = ((p - residues[j]) * ((p + 1) // 2)) % p
+            if start + 2 * i == p:
+                i += p
+            if i < window:
+                flags[i::p] = bytes(len(range(i, window, p)))
+            residues[j] = (residues[j] + step) % p
+        for i in itertools.compress(range(window), flags):
+            N = start + 2 * i
+            if _survivor_is_prime(N, k):
+                yield N
+        start += step
+
+# TIME COMPLEXITY: O(n^4 / log n)
+# SPACE COMPLEXITY: O(PRIME_WINDOW)
+def next_prime(n, k=GENERATE_ROUNDS):
+    # Smallest (probable) prime strictly greater than n
+    return next(iter_primes_from(n + 1, k))
+
+# TIME COMPLEXITY: O(n^4 / log n)
+# SPACE COMPLEXITY: O(PRIME_WINDOW)
+def random_prime(bits, k=GENERATE_ROUNDS, rng=random):
+    # Random (probable) prime with exactly `bits` bits: the first prime after a
+    # random starting point with the top bit set. Restarts if the search runs
+    # past 2^bits.
+    if bits < 2:
+        raise ValueError('A prime needs at least 2 bits')
+    while True:
+        start = rng.getrandbits(bits) | (1 << (bits - 1))
+        p = next(iter_primes_from(start, k))
+        if p.bit_length() == bits:
+            return p
+
+# Confidence recorded for verdicts that are exact rather than probabilistic
+EXACT = math.inf
+# Default number of verdicts held in memory by a VerdictCache
+CACHE_CAPACITY = 1 << 16
+
+class VerdictCache:
+    # Verdict cache for prime_test, keyed by N. Each entry records the confidence
+    # it was reached at (k rounds, or EXACT), so an entry computed at k=20 also
+    # answers a later k=10 request. A 'composite' from both tests is a proof, so
+    # it answers any request. The in-memory tier is a bounded LRU; an optional
+    # on-disk tier (a dbm file at `path`) outlives the process and is written
+    # through on every store.
+
+    def __init__(self, capacity=CACHE_CAPACITY, path=None):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.disk = dbm.open(path, 'c') if path is not None else None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    # Returns the cached (fermat, miller_rabin) pair if it is good enough for
+    # the requested confidence, else None
+    def lookup(self, N, confidence):
+        entry = self.entries.get(N)
+        if entry is not None:
+            self.entries.move_to_end(N)
+        elif self.disk is not None:
+            raw = self.disk.get(str(N))
+            if raw is not None:
+                entry = self._decode(raw)
+                self._remember(N, entry)
+                self.disk_hits += 1
+        if entry is not None and self._answers(entry, confidence):
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+        return None
+
+    def store(self, N, confidence, verdicts):
+        # Keeps whichever of the old and new entries is more confident
+        old = self.entries.get(N)
+        if old is None and self.disk is not None:
+            raw = self.disk.get(str(N))
+            old = self._decode(raw) if raw is not None else None
+        if old is not None and old[0] >= confidence:
+            return
+        entry = (confidence, verdicts[0], verdicts[1])
+        self._remember(N, entry)
+        if self.disk is not None:
+            self.disk[str(N)] = self._encode(entry)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'disk_hits': self.disk_hits,
+                'evictions': self.evictions, 'size': len(self.entries), 'capacity': self.capacity}
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remember(self, N, entry):
+        self.entries[N] = entry
+        self.entries.move_to_end(N)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _answers(entry, confidence):
+        return entry[0] >= confidence or (entry[1] == 'composite' and entry[2] == 'composite')
+
+    # On disk an entry is b'<confidence> <fermat> <miller_rabin>', e.g. b'20 prime prime'
+    @staticmethod
+    def _encode(entry):
+        return '{} {} {}'.format(*entry).encode()
+
+    @staticmethod
+    def _decode(raw):
+        confidence, f, mr = raw.decode().split()
+        return float(confidence), f, mr
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+# Benchmarks for the primality module. Run from this directory:
+#
+#     python3 fermat_bench.py
+#
+# It also runs check_sieve, which cross-checks the segmented sieve against
+# Miller-Rabin, and check_vectorized, which compares the NumPy batch path
+# with the scalar one. Everything here is headless; no PyQt is needed.
+
+import itertools
+import math
+import random
+import sys
+import time
+
+from fermat import *
+
+
+BENCH_BITS = [64, 512, 2048, 4096]
+
+
+# Random odd number with exactly the given number of bits
+def random_odd(bits, rng=random):
+    return rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+
+# Runs fn once per argument tuple and returns calls per second
+def _throughput(fn, args):
+    t1 = time.perf_counter()
+    for a in args:
+        fn(*a)
+    t2 = time.perf_counter()
+    return len(args) / (t2 - t1)
+
+def bench_mod_exp(bits_list=BENCH_BITS, reps=None, seed=312):
+    # Throughput of each mod_exp engine at full-size exponents, checked
+    # against Python's built-in pow() so a wrong engine cannot look fast.
+    rng = random.Random(seed)
+    engines = [('binary', mod_exp_binary), ('window', mod_exp_window), ('builtin pow', pow)]
+    rows = []
+    for bits in bits_list:
+        n_reps = reps or max(3, 40000 // bits)
+        args = []
+        for _ in range(n_reps):
+            N = random_odd(bits, rng)
+            args.append((rng.randrange(2, N - 1), N - 1, N))
+        for x, y, N in args[:3]:
+            for name, fn in engines:
+                assert fn(x, y, N) == pow(x, y, N), name
+        row = {'bits': bits}
+        for name, fn in engines:
+            row[name] = _throughput(fn, args)
+        rows.append(row)
+    return rows
+
+# The old way: prime_test on fresh random odd numbers until one passes
+def naive_random_prime(bits, k, rng):
+    while True:
+        N = random_odd(bits, rng)
+        if prime_test(N, k) == ('prime', 'prime'):
+            return N
+
+def bench_random_prime(bits_list=(1024, 2048), count=None, k=GENERATE_ROUNDS, seed=312):
+    # Primes generated per second with the incremental sieve (random_prime)
+    # and with the naive prime_test loop.
+    rows = []
+    for bits in bits_list:
+        n_primes = count or max(2, 8192 // bits)
+        row = {'bits': bits}
+        for name, fn in [('sieved', random_prime), ('naive', naive_random_prime)]:
+            rng = random.Random(seed)
+            row[name] = _throughput(lambda: fn(bits, k, rng), [()] * n_primes)
+        rows.append(row)
+    return rows
+
+def bench_bpsw(bits_list=(512, 1024, 2048), count=None, seed=312):
+    # Tests/sec on primes (the worst case, where every round runs) for
+    # Baillie-PSW against Miller-Rabin at 20 and 40 rounds.
+    rng = random.Random(seed)
+    rows = []
+    for bits in bits_list:
+        n_tests = count or max(3, 8192 // bits)
+        args = [(random_prime(bits, 1, rng),) for _ in range(n_tests)]
+        rows.append({'bits': bits,
+                     'bpsw': _throughput(baillie_psw, args),
+                     'mr k=20': _throughput(lambda N: miller_rabin(N, 20), args),
+                     'mr k=40': _throughput(lambda N: miller_rabin(N, 40), args)})
+    return rows
+
+# Primality modes the latency benchmark can drive, as name -> fn(N, k)
+BENCH_MODES = {
+    'fermat': fermat,
+    'miller_rabin': miller_rabin,
+    'prime_test': prime_test,
+    'deterministic': lambda N, k: prime_test(N, k, 'deterministic'),
+    'bpsw': lambda N, k: baillie_psw(N),
+}
+
+# Nearest-rank percentile of an already sorted list
+def percentile(sorted_values, q):
+    i = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+def bench_latency(modes=tuple(BENCH_MODES), bits_list=(64, 512, 2048), count=200, k=20,
+                  primes_only=False, seed=312):
+    # Per-call latency percentiles (in ms) and throughput for each mode and bit
+    # size. Every mode sees the same seeded candidates, and the witness RNG is
+    # reseeded per run, so repeated runs time the same work. primes_only uses
+    # primes as candidates, the worst case where every round runs.
+    rows = []
+    for bits in bits_list:
+        rng = random.Random(seed + bits)
+        if primes_only:
+            candidates = [random_prime(bits, 1, rng) for _ in range(count)]
+        else:
+            candidates = [random_odd(bits, rng) for _ in range(count)]
+        for mode in modes:
+            fn = BENCH_MODES[mode]
+            random.seed(seed)
+            latencies = []
+            t1 = time.perf_counter()
+            for N in candidates:
+                c1 = time.perf_counter()
+                fn(N, k)
+                latencies.append((time.perf_counter() - c1) * 1000.0)
+            total = time.perf_counter() - t1
+            latencies.sort()
+            rows.append({'mode': mode, 'bits': bits, 'count': count, 'k': k,
+                         'p50_ms': percentile(latencies, 50), 'p90_ms': percentile(latencies, 90),
+                         'p99_ms': percentile(latencies, 99), 'max_ms': latencies[-1],
+                         'per_sec': count / total})
+    return rows
+
+# Windows the sieve check covers, as (lo, hi): the edges around 0..3, empty
+# windows with lo > hi, a stretch of small numbers and one window near 10^12
+SIEVE_CHECK_WINDOWS = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 3), (3, 3), (0, 3), (3, 2),
+                       (10, 5), (1, 0), (4, 4), (0, 1000), (997, 1009), (10**12 - 3000, 10**12 + 3000)]
+
+def check_sieve(windows=SIEVE_CHECK_WINDOWS, segment_sizes=(1, 2, 3, 7, 64, SEGMENT_BYTES), random_windows=200,
+                seed=312):
+    # primes_in_range and count_primes_in_range against miller_rabin_deterministic
+    # on every number of each window, for segment sizes down to a single byte
+    # so windows straddle many segment boundaries. Returns the number of
+    # (window, segment size) pairs checked.
+    rng = random.Random(seed)
+    windows = list(windows)
+    for _ in range(random_windows):
+        lo = rng.randrange(0, 100000)
+        windows.append((lo, lo + rng.randrange(-5, 500)))
+    checked = 0
+    for lo, hi in windows:
+        expected = [N for N in range(lo, hi + 1) if miller_rabin_deterministic(N) == 'prime']
+        for segment_bytes in segment_sizes:
+            # one byte per odd number, so tiny segments near 10^12 mean a lot of windows
+            if hi > 10**9 and segment_bytes < 64:
+                continue
+            assert list(primes_in_range(lo, hi, segment_bytes)) == expected, (lo, hi, segment_bytes)
+            assert count_primes_in_range(lo, hi, segment_bytes) == len(expected), (lo, hi, segment_bytes)
+            checked += 1
+    return checked
+
+def check_vectorized(random_count=200000, seed=312):
+    # prime_test_vectorized against the scalar path of prime_test_many, both
+    # in deterministic mode, so every verdict must match exactly. Covers 0..5000,
+    # both sides of the trial-division limit and of its square (with squares
+    # and products of primes just above the limit, which trial division
+    # cannot settle), strong pseudoprimes to small bases, the top of the
+    # vector range and random N below VECTOR_LIMIT. Returns the number of
+    # values checked.
+    if np is None:
+        return 0
+    rng = random.Random(seed)
+    limit = TRIAL_DIVISION_LIMIT
+    above = list(itertools.islice(iter_primes_from(limit), 8))
+    values = list(range(5000))
+    values += range(limit - 64, limit + 64)
+    values += range(limit * limit - 2000, limit * limit + 2000)
+    values += [p * q for p in above for q in above]
+    values += [2047, 3277, 4033, 4681, 8321, 1194649, 1373653, 25326001]
+    values += range(VECTOR_LIMIT - 2000, VECTOR_LIMIT)
+    values += [rng.randrange(VECTOR_LIMIT) for _ in range(random_count)]
+
+    vectorized = prime_test_vectorized(values, 0, 'deterministic')
+    # prime_test_many takes the vectorized path itself for big batches, so the
+    # scalar reference is built from batches just under VECTOR_MIN_BATCH
+    scalar = bytearray()
+    step = VECTOR_MIN_BATCH - 1
+    for i in range(0, len(values), step):
+        scalar += prime_test_many(values[i:i + step], 0, 'deterministic')
+    for N, v, s in zip(values, vectorized, scalar):
+        assert v == s, (N, v, s)
+    return len(values)
+
+def print_rows(rows, columns, title):
+    print(title)
+    print('{:>6}'.format('bits') + ''.join('{:>14}'.format(c) for c in columns))
+    for row in rows:
+        print('{:>6}'.format(row['bits']) + ''.join('{:>14.2f}'.format(row[c]) for c in columns))
+    print()
+
+
+if __name__ == '__main__':
+    bits_list = [int(b) for b in sys.argv[1:]] or BENCH_BITS
+    print_rows(bench_mod_exp(bits_list), ['binary', 'window', 'builtin pow'],
+               'mod_exp throughput (exponentiations/sec, full-size exponent)')
+    print_rows(bench_random_prime(), ['sieved', 'naive'],
+               'random_prime throughput (primes/sec, k={})'.format(GENERATE_ROUNDS))
+    print_rows(bench_bpsw(), ['bpsw', 'mr k=20', 'mr k=40'],
+               'Baillie-PSW vs Miller-Rabin on primes (tests/sec)')
+
+    checked = check_sieve()
+    print('Segmented sieve matched miller_rabin_deterministic on {} window/segment-size pairs'.format(checked))
+
+    checked = check_vectorized()
+    print('Vectorized path matched the scalar path on {} values below VECTOR_LIMIT'.format(checked))
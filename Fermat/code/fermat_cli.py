@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# Headless front end for the primality module, for machines without PyQt or a display.
+#
+#     python3 fermat_cli.py test [-k K] [--mode MODE] [FILE]    (FILE defaults to stdin)
+#     python3 fermat_cli.py bench [--bits ...] [--modes ...] [--json]
+#
+# `test` reads one integer per line (blank lines and # comments are skipped) and
+# writes "N<TAB>fermat<TAB>miller_rabin" per candidate, flushed as it goes.
+
+import argparse
+import json
+import sys
+
+from fermat import *
+from fermat_bench import BENCH_MODES, bench_latency
+
+
+def read_candidates(stream):
+    for line in stream:
+        line = line.split('#', 1)[0].strip()
+        if line:
+            yield int(line)
+
+def run_test(args):
+    stream = open(args.file) if args.file and args.file != '-' else sys.stdin
+    try:
+        candidates = read_candidates(stream)
+        if args.jobs > 1:
+            results = ((N, decode_verdict(v)) for N, v in
+                       iter_prime_test_parallel(candidates, args.k, args.mode, args.jobs, args.chunksize))
+        else:
+            results = ((N, prime_test(N, args.k, args.mode)) for N in candidates)
+        for N, (f, mr) in results:
+            sys.stdout.write('{}\t{}\t{}\n'.format(N, f, mr))
+            if args.jobs <= 1:
+                sys.stdout.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return 0
+
+def run_bench(args):
+    rows = bench_latency(args.modes, args.bits, args.count, args.k, args.primes, args.seed)
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+    columns = ['p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'per_sec']
+    print('{:>14}{:>6}'.format('mode', 'bits') + ''.join('{:>12}'.format(c) for c in columns))
+    for row in rows:
+        print('{:>14}{:>6}'.format(row['mode'], row['bits']) +
+              ''.join('{:>12.3f}'.format(row[c]) for c in columns))
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Fermat / Miller-Rabin primality testing without the GUI')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    test = sub.add_parser('test', help='test candidates read from a file or stdin')
+    test.add_argument('file', nargs='?', help='file with one integer per line (default: stdin)')
+    test.add_argument('-k', type=int, default=20, help='random trials per test (default 20)')
+    test.add_argument('--mode', choices=['random', 'deterministic', 'bpsw'], default='random')
+    test.add_argument('--jobs', type=int, default=1, help='worker processes (default 1)')
+    test.add_argument('--chunksize', type=int, default=PARALLEL_CHUNKSIZE,
+                      help='candidates per worker task when --jobs > 1')
+    test.set_defaults(func=run_test)
+
+    bench = sub.add_parser('bench', help='latency percentiles and throughput per mode and bit size')
+    bench.add_argument('--bits', type=int, nargs='+', default=[64, 512, 2048])
+    bench.add_argument('--modes', nargs='+', choices=sorted(BENCH_MODES), default=list(BENCH_MODES))
+    bench.add_argument('--count', type=int, default=200, help='candidates per bit size (default 200)')
+    bench.add_argument('-k', type=int, default=20, help='random trials per test (default 20)')
+    bench.add_argument('--primes', action='store_true', help='benchmark on primes only (worst case)')
+    bench.add_argument('--seed', type=int, default=312, help='seed for candidates and witnesses')
+    bench.add_argument('--json', action='store_true', help='print rows as JSON')
+    bench.set_defaults(func=run_bench)
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    sys.exit(args.func(args))
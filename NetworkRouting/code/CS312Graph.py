@@ -1,5 +1,10 @@
 #!/usr/bin/python3
 
+import itertools
+import os
+
+import numpy as np
+
 
 class CS312GraphEdge:
     def __init__( self, src_node, dest_node, edge_length ):
@@ -47,3 +52,176 @@ class CS312Graph:
     def getNodes( self ):
         return self.nodes
 
+    def getNodeCount( self ):
+        return len(self.nodes)
+
+    # (neighbor id, edge length) for every edge leaving node u
+    def edgesFrom( self, u ):
+        return [(edge.dest.node_id, edge.length) for edge in self.nodes[u].neighbors]
+
+
+# The same graph in compressed sparse row form: the edges leaving node u are
+# indices[indptr[u]:indptr[u+1]] with lengths weights[indptr[u]:indptr[u+1]].
+# That is 12 bytes per edge instead of a CS312GraphEdge object each.
+# NetworkRoutingSolver only needs getNodeCount/edgesFrom, and .nodes gives
+# the GUI the usual CS312GraphNode objects, built on demand.
+class CS312CSRGraph:
+    INDPTR_DTYPE  = np.int64
+    INDICES_DTYPE = np.int32
+    WEIGHTS_DTYPE = np.float64
+
+    def __init__( self, nodeList, edgeList ):
+        size = len(nodeList)
+        counts = np.fromiter( (len(edgeList[i]) for i in range(size)), dtype=np.int64, count=size )
+        indptr = np.zeros( size+1, dtype=self.INDPTR_DTYPE )
+        np.cumsum( counts, out=indptr[1:] )
+        # the (neighbor, length) pairs flattened in node order, in one pass
+        pairs = itertools.chain.from_iterable( itertools.chain.from_iterable(edgeList[i] for i in range(size)) )
+        flat = np.fromiter( pairs, dtype=np.float64, count=2*int(indptr[-1]) )
+        self.setArrays( nodeList, indptr, flat[0::2].astype(self.INDICES_DTYPE), flat[1::2].astype(self.WEIGHTS_DTYPE) )
+
+    # Builds the graph straight from CSR arrays (for example ones mapped from
+    # a graph file), without copying them
+    @classmethod
+    def fromArrays( cls, locations, indptr, indices, weights ):
+        graph = cls.__new__(cls)
+        graph.setArrays( locations, indptr, indices, weights )
+        return graph
+
+    def setArrays( self, locations, indptr, indices, weights ):
+        assert( len(indptr) == len(locations)+1 and len(indices) == len(weights) == indptr[-1] )
+        self.locations = locations
+        self.indptr    = indptr
+        self.indices   = indices
+        self.weights   = weights
+        self.nodes     = CS312CSRNodes(self)
+
+    def __str__( self ):
+        return str([self.edgesFrom(u) for u in range(self.getNodeCount())])
+
+    def getNodes( self ):
+        return self.nodes
+
+    def getNodeCount( self ):
+        return len(self.indptr)-1
+
+    def getEdgeCount( self ):
+        return len(self.indices)
+
+    # (neighbor id, edge length) for every edge leaving node u
+    def edgesFrom( self, u ):
+        lo, hi = self.indptr[u], self.indptr[u+1]
+        return list(zip( self.indices[lo:hi].tolist(), self.weights[lo:hi].tolist() ))
+
+
+# Sequence view of a CS312CSRGraph as CS312GraphNode objects. Each lookup
+# builds a fresh node whose edges point at fresh neighbor nodes; those
+# neighbors have no edges of their own, so nothing is built past one hop.
+class CS312CSRNodes:
+    def __init__( self, graph ):
+        self.graph = graph
+
+    def __len__( self ):
+        return self.graph.getNodeCount()
+
+    def __getitem__( self, i ):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('node index out of range')
+        locations = self.graph.locations
+        node = CS312GraphNode( i, locations[i] )
+        for v, length in self.graph.edgesFrom(i):
+            node.addEdge( CS312GraphNode(v, locations[v]), length )
+        return node
+
+    def __iter__( self ):
+        for i in range(len(self)):
+            yield self[i]
+
+
+# Graph file format, all little-endian:
+#
+#   header   GRAPH_HEADER, padded to GRAPH_ALIGN bytes
+#   coords   float64 [node_count, 2]
+#   indptr   int64   [node_count+1]
+#   indices  int32   [edge_count]
+#   weights  float64 [edge_count]
+#
+# Every section starts on a GRAPH_ALIGN boundary. openGraphFile maps the
+# file read-only, so opening it reads only the header and every process
+# that opens the same file shares its pages through the OS page cache.
+GRAPH_MAGIC   = b'CS312CSR'
+GRAPH_VERSION = 1
+GRAPH_ALIGN   = 64
+GRAPH_HEADER  = np.dtype([('magic', 'S8'), ('version', '<u4'), ('reserved', '<u4'),
+                          ('node_count', '<u8'), ('edge_count', '<u8')])
+GRAPH_SECTIONS = (('coords', '<f8'), ('indptr', '<i8'), ('indices', '<i4'), ('weights', '<f8'))
+
+def _align( offset ):
+    return -(-offset // GRAPH_ALIGN) * GRAPH_ALIGN
+
+# Byte offset and element count of every section, and the total file size
+def _graphLayout( node_count, edge_count ):
+    counts = {'coords': 2*node_count, 'indptr': node_count+1, 'indices': edge_count, 'weights': edge_count}
+    layout = {}
+    offset = _align(GRAPH_HEADER.itemsize)
+    for name, dtype in GRAPH_SECTIONS:
+        layout[name] = (offset, counts[name])
+        offset = _align(offset + counts[name]*np.dtype(dtype).itemsize)
+    return layout, offset
+
+# Node locations as an (n, 2) float64 array; they may be (x, y) tuples,
+# QPointF objects from the GUI or already an array
+def _coordinates( locations ):
+    if len(locations) and hasattr(locations[0], 'x') and callable(locations[0].x):
+        locations = [(p.x(), p.y()) for p in locations]
+    return np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+
+# Writes a CS312Graph or CS312CSRGraph to path. The file is written under a
+# temporary name and renamed into place, so a reader never sees half of it.
+def writeGraphFile( path, graph ):
+    if type(graph) == CS312Graph:
+        locations = [node.loc for node in graph.nodes]
+        graph = CS312CSRGraph( locations, [graph.edgesFrom(u) for u in range(graph.getNodeCount())] )
+    arrays = {'coords': _coordinates(graph.locations), 'indptr': graph.indptr,
+              'indices': graph.indices, 'weights': graph.weights}
+    node_count, edge_count = graph.getNodeCount(), graph.getEdgeCount()
+    layout, size = _graphLayout( node_count, edge_count )
+    header = np.zeros( 1, dtype=GRAPH_HEADER )
+    header[0] = (GRAPH_MAGIC, GRAPH_VERSION, 0, node_count, edge_count)
+
+    temp = '{}.tmp{}'.format(path, os.getpid())
+    with open(temp, 'wb') as f:
+        f.write( header.tobytes() )
+        for name, dtype in GRAPH_SECTIONS:
+            f.seek( layout[name][0] )
+            f.write( np.ascontiguousarray(arrays[name], dtype=dtype).tobytes() )
+        f.truncate( size )
+    os.replace( temp, path )
+
+# Opens a graph file written by writeGraphFile as a read-only CS312CSRGraph
+# whose arrays are views into one memory map of the file
+def openGraphFile( path ):
+    data = np.memmap( path, dtype=np.uint8, mode='r' )
+    if len(data) < GRAPH_HEADER.itemsize:
+        raise ValueError('{}: too short to be a graph file'.format(path))
+    header = data[:GRAPH_HEADER.itemsize].view(GRAPH_HEADER)[0]
+    if header['magic'] != GRAPH_MAGIC:
+        raise ValueError('{}: not a graph file'.format(path))
+    if header['version'] != GRAPH_VERSION:
+        raise ValueError('{}: unsupported graph file version {}'.format(path, header['version']))
+    node_count, edge_count = int(header['node_count']), int(header['edge_count'])
+    layout, size = _graphLayout( node_count, edge_count )
+    if len(data) != size:
+        raise ValueError('{}: expected {} bytes, found {}'.format(path, size, len(data)))
+
+    # plain ndarray views of the map: slicing an np.memmap builds a memmap
+    # object every time, which costs more than the slice on small rows
+    data = data.view(np.ndarray)
+    arrays = {}
+    for name, dtype in GRAPH_SECTIONS:
+        offset, count = layout[name]
+        arrays[name] = data[offset:offset + count*np.dtype(dtype).itemsize].view(dtype)
+    return CS312CSRGraph.fromArrays( arrays['coords'].reshape(node_count, 2), arrays['indptr'],
+                                     arrays['indices'], arrays['weights'] )
@@ -1,33 +1,50 @@
 from CS312Graph import *
+import os
+import tempfile
 import time
 import numpy as np
 import collections
+from concurrent.futures import ProcessPoolExecutor
 
 class NetworkRoutingSolver:
     def __init__( self):
         pass
 
     def initializeNetwork( self, network ):
-        assert( type(network) == CS312Graph )
+        assert( type(network) in (CS312Graph, CS312CSRGraph) )
         self.network = network
-        self.dist = [np.inf] * len(self.network.nodes)
-        self.prev = [None] * len(self.network.nodes)
+        self.dist = [np.inf] * self.network.getNodeCount()
+        self.prev = [None] * self.network.getNodeCount()
         self.binaryHeap = []
         self.pointerArray = []
+        # positionArray[node_id] is the node's index in binaryHeap/pointerArray,
+        # or -1 when it is not in the heap. swap() keeps it in sync, which is
+        # what lets decreaseKey find a node without scanning.
+        self.positionArray = [-1] * self.network.getNodeCount()
+
+    # Clear the results and the queue of a previous computeShortestPaths call
+    def resetNetwork( self ):
+        size = self.network.getNodeCount()
+        self.dist = [np.inf] * size
+        self.prev = [None] * size
+        self.binaryHeap = []
+        self.pointerArray = []
+        self.positionArray = [-1] * size
 
     def getShortestPath( self, destIndex ):
         self.dest = destIndex
         path_edges = []
         total_length = 0
 
-        node = self.network.nodes[self.dest]
-        while node.node_id != self.source:
+        node = self.dest
+        while node != self.source:
             prevNode = node
-            node = self.network.nodes[self.prev[node.node_id]] # <--- this will not work for HEAP because here is where "prev" is used
-            for edge in node.neighbors:
-                if edge.dest.node_id == prevNode.node_id:
-                    path_edges.append( (edge.src.loc, edge.dest.loc, '{:.0f}'.format(edge.length)) )
-                    total_length += edge.length
+            node = self.prev[node]
+            # only the ids come from prev; the locations for the GUI come
+            # from the graph's node objects
+            length = min(l for v, l in self.network.edgesFrom(node) if v == prevNode)
+            path_edges.append( (self.network.nodes[node].loc, self.network.nodes[prevNode].loc, '{:.0f}'.format(length)) )
+            total_length += length
 
         return {'cost':total_length, 'path':path_edges}
 
@@ -35,27 +52,32 @@ class NetworkRoutingSolver:
     # Time Complexity: O(1)
     #######################
     def makequeue(self):
-        # populate heap array
-
-        # SET VALUES TO DIST AND PREV
-        startNode = self.network.nodes[self.source]
-        self.insert_heap(0, startNode)
-        for edge in startNode.neighbors:
-            self.insert_heap(edge.length, edge.dest)
+        # populate heap array with the source only; every other node is
+        # inserted when it is first reached, so none is ever queued twice
+        self.insert_heap(0, self.source)
 
         return
 
     #######################
     # Time Complexity: O(logn)
     #######################
-    def insert_heap(self, distance, nodeIn):
+    def insert_heap(self, distance, nodeId):
         index = len(self.binaryHeap)
         self.binaryHeap.append(distance)
-        self.pointerArray.append(nodeIn.node_id)
+        self.pointerArray.append(nodeId)
+        self.positionArray[nodeId] = index
+        self.sift_up(index)
+
+    #######################
+    # Time Complexity: O(logn)
+    #######################
+    def sift_up(self, index):
+        # swap with the parent while the parent is bigger
         while (index != 0):
             p = self.parent(index)
-            if (self.binaryHeap[p] > self.binaryHeap[index]):
-                self.swap(p, index)
+            if (self.binaryHeap[p] <= self.binaryHeap[index]):
+                break
+            self.swap(p, index)
             index = p
 
     def parent(self, i):
@@ -73,6 +95,8 @@ class NetworkRoutingSolver:
     def swap(self, i, j):
         self.binaryHeap[i], self.binaryHeap[j] = self.binaryHeap[j], self.binaryHeap[i]
         self.pointerArray[i], self.pointerArray[j] = self.pointerArray[j], self.pointerArray[i]
+        self.positionArray[self.pointerArray[i]] = i
+        self.positionArray[self.pointerArray[j]] = j
 
     #######################
     # Time Complexity: O(n)
@@ -84,103 +108,79 @@ class NetworkRoutingSolver:
         nodeId = -1
 
         for i in range(len(tempNodes)):
-            if lowestDistance > self.dist[tempNodes[i].node_id]:
-                lowestDistance = self.dist[tempNodes[i].node_id]
+            if lowestDistance > self.dist[tempNodes[i]]:
+                lowestDistance = self.dist[tempNodes[i]]
                 lowestIndex = i
-                nodeId = tempNodes[i].node_id
+                nodeId = tempNodes[i]
         if lowestIndex != -1:
             del tempNodes[lowestIndex]
 
         return nodeId
 
     #######################
-    # Time Complexity: O(n) should be O(logn
+    # Time Complexity: O(logn)
     #######################
     def decreaseKey(self, nodeIdToDecrease, updateDistance):
-        for i in range(len(self.pointerArray)):                 # <---------------- CAN BE SPED UP HERE
-            if nodeIdToDecrease == self.pointerArray[i]:
-                self.binaryHeap[i] = updateDistance
-                # change the value in heap to updateDistance
-                # check if parent is bigger, if so, swap.
-                index = i
-                while (index != 0):
-                    p = self.parent(index)
-                    if (self.binaryHeap[p] > self.binaryHeap[index]):
-                        self.swap(p, index)
-                    index = p
-                break
+        # look the node up in positionArray, change its value in the heap to
+        # updateDistance and sift it up past any bigger parents
+        i = self.positionArray[nodeIdToDecrease]
+        if i == -1:
+            return
+        self.binaryHeap[i] = updateDistance
+        self.sift_up(i)
         return
 
     #########################
     # Time Complexity: O(logn)
     #########################
-    def sift_down(self):
-        # check right or left and replace with whichever one is smaller
-        # continue until either null child or at bottom
-        # if none less, then end
-        index = 0
-        changed = True
-        while(changed):
-            # if both null, break
-            if (self.right_child(index) > len(self.binaryHeap)-1 and self.left_child(index) > len(self.binaryHeap)-1):
+    def sift_down(self, index=0):
+        # swap with the smaller child while that child is smaller, until the
+        # node has no children left
+        heap = self.binaryHeap
+        size = len(heap)
+        while True:
+            smallest = index
+            left = self.left_child(index)
+            right = left + 1
+            if left < size and heap[left] < heap[smallest]:
+                smallest = left
+            if right < size and heap[right] < heap[smallest]:
+                smallest = right
+            if smallest == index:
                 break
-            # null right, check left. if less, swap
-            elif (self.right_child(index) > len(self.binaryHeap)-1):
-                if (self.binaryHeap[self.left_child(index)] < self.binaryHeap[index]):
-                    self.swap(self.left_child(index), index)
-                    index = self.left_child(index)
-                else:
-                    break
-            # if left < right, check left. if less, swap
-            elif (self.binaryHeap[self.left_child(index)] < self.binaryHeap[self.right_child(index)]):
-                if (self.binaryHeap[self.left_child(index)] < self.binaryHeap[index]):
-                    self.swap(self.left_child(index), index)
-                    index = self.left_child(index)
-                else:
-                    break
-            # if left > right, check right. if less, swap
-            elif (self.binaryHeap[self.left_child(index)] > self.binaryHeap[self.right_child(index)]):
-                if (self.binaryHeap[self.right_child(index)] < self.binaryHeap[index]):
-                    self.swap(self.right_child(index), index)
-                    index = self.right_child(index)
-                else:
-                    break
-            changed = False
+            self.swap(index, smallest)
+            index = smallest
         return
 
     ########################
     # Time Complexity: O(logn)
     ########################
     def deletemin_heap(self):
-        # pop the top off of both arrays
+        # move the last entry to the root, pop the old root off the end of
+        # both arrays and sift the new root down; nothing else shifts
         if (len(self.binaryHeap) == 0):
             return
         else:
+            self.swap(0, len(self.binaryHeap)-1)
+            distance = self.binaryHeap.pop()
+            node = self.pointerArray.pop()
+            self.positionArray[node] = -1
 
-            distance = self.binaryHeap.pop(0)
-            i = self.pointerArray.pop(0)
-            node = self.network.nodes[i]
-
-            # set the last value to the first
-            if (len(self.binaryHeap) != 0):
-                bHtoAppend = self.binaryHeap.pop(len(self.binaryHeap)-1)
-                self.binaryHeap.insert(0, bHtoAppend)
-                pAtoAppend = self.pointerArray.pop(len(self.pointerArray)-1)
-                self.pointerArray.insert(0, pAtoAppend)
-
-                # sift down until ordered properly
-                self.sift_down()
+            # sift down until ordered properly
+            if (len(self.binaryHeap) > 1):
+                self.sift_down(0)
 
         return node, distance
 
     # used to populate arrays
     ###############################
     # Time Complexity Array: O(n^2)
-    # Time Complexity Heap: worst case O(n^2) should be O(nlogn)
+    # Time Complexity Heap: O((V+E)logV)
     ###############################
     def computeShortestPaths( self, srcIndex, use_heap=False ):
         # if not use heap, do priority queue
         self.source = srcIndex
+        self.resetNetwork()
         if use_heap == False:
             t1 = time.time()
 
@@ -189,16 +189,16 @@ class NetworkRoutingSolver:
             i = self.source
             self.prev[self.source] = None
 
-            tempNodes = self.network.nodes[:]
+            tempNodes = list(range(self.network.getNodeCount()))
             del tempNodes[self.source]
 
-            for indx in range(len(self.network.nodes)):
-                node = self.network.nodes[i] # begin with starting node
-                for edge in node.neighbors: # for all edges(u, v) in E:
-                    alt = self.dist[i] + edge.length
-                    if (self.dist[edge.dest.node_id] > alt):
-                        self.dist[edge.dest.node_id] = alt
-                        self.prev[edge.dest.node_id] = edge.src.node_id
+            # begin with starting node; stop early once only unreachable nodes are left
+            while i != -1:
+                for v, length in self.network.edgesFrom(i): # for all edges(u, v) in E:
+                    alt = self.dist[i] + length
+                    if (self.dist[v] > alt):
+                        self.dist[v] = alt
+                        self.prev[v] = i
                 i = self.deletemin_array(tempNodes)
             t2 = time.time()
         else:
@@ -214,17 +214,96 @@ class NetworkRoutingSolver:
             while len(self.binaryHeap) != 0:
                 node, distance = self.deletemin_heap()
 
-                for edge in node.neighbors:
-                    alt = self.dist[edge.src.node_id] + edge.length
-                    if (self.dist[edge.dest.node_id] == np.inf):
-                        self.insert_heap( alt, edge.dest)
-                        #self.dist[edge.dest.node_id] = edge.length
-                        self.prev[edge.dest.node_id] = node.node_id
-                    old = self.dist[edge.dest.node_id]
-                    if (old > alt):
-                        self.dist[edge.dest.node_id] = alt
-                        self.prev[edge.dest.node_id] = edge.src.node_id
-                        self.decreaseKey(edge.dest.node_id, self.dist[edge.src.node_id] + edge.length)
+                for v, length in self.network.edgesFrom(node):
+                    alt = distance + length
+                    if (self.dist[v] == np.inf):
+                        # first time v is reached
+                        self.dist[v] = alt
+                        self.prev[v] = node
+                        self.insert_heap(alt, v)
+                    elif (self.dist[v] > alt):
+                        self.dist[v] = alt
+                        self.prev[v] = node
+                        self.decreaseKey(v, alt)
             t2 = time.time()
         return (t2-t1)
 
+
+# Sources handed to a worker at a time; each block comes back as a
+# (block size x node count) slice of the distance matrix
+DISTANCE_BLOCK = 16
+
+# Worker state: every worker maps the same graph file read-only once, at
+# startup, and keeps one solver for all the blocks it is given
+_worker_solver = None
+
+def _init_worker(path):
+    global _worker_solver
+    _worker_solver = NetworkRoutingSolver()
+    _worker_solver.initializeNetwork(openGraphFile(path))
+
+def _distance_block(sources, dtype):
+    solver = _worker_solver
+    block = np.empty((len(sources), solver.network.getNodeCount()), dtype=dtype)
+    for row, source in enumerate(sources):
+        solver.computeShortestPaths(source, use_heap=True)
+        block[row] = solver.dist
+    return block
+
+###############################
+# Time Complexity: O(S(V+E)logV / workers) for S sources
+# Space Complexity: O(workers * blockSize * V)
+###############################
+def iterDistanceBlocks(graphPath, sources, workers=None, blockSize=DISTANCE_BLOCK, dtype=np.float64):
+    # Generator of (first row, block) pairs, in source order, where block[i]
+    # holds the distances from sources[first row + i] to every node (inf when
+    # unreachable). The sources are spread over a process pool whose workers
+    # share the graph file at graphPath through the page cache. At most 2
+    # blocks per worker are in flight, so a caller writing the blocks out as
+    # they arrive needs memory for those blocks only.
+    sources = list(sources)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graphPath,))
+    in_flight = collections.deque()
+    start = 0
+    try:
+        while True:
+            while len(in_flight) < max_in_flight and start < len(sources):
+                chunk = sources[start:start + blockSize]
+                in_flight.append((start, executor.submit(_distance_block, chunk, dtype)))
+                start += len(chunk)
+            if not in_flight:
+                return
+            first, future = in_flight.popleft()
+            yield first, future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+###############################
+# Time Complexity: O(S(V+E)logV / workers) for S sources
+# Space Complexity: O(SV)
+###############################
+def computeDistanceMatrix(network, sources, workers=None, blockSize=DISTANCE_BLOCK, dtype=np.float64, out=None):
+    # Dense len(sources) x V matrix of shortest distances; dtype=np.float32
+    # halves it. network is a graph file path, or a CS312Graph/CS312CSRGraph
+    # that is first written to a temporary graph file for the workers to map.
+    # out may be a preallocated array of the right shape, e.g. an np.memmap
+    # for matrices bigger than memory.
+    sources = list(sources)
+    if isinstance(network, (str, os.PathLike)):
+        size = openGraphFile(network).getNodeCount()
+    else:
+        size = network.getNodeCount()
+    if out is None:
+        out = np.empty((len(sources), size), dtype=dtype)
+    assert( out.shape == (len(sources), size) )
+
+    if isinstance(network, (str, os.PathLike)):
+        for first, block in iterDistanceBlocks(network, sources, workers, blockSize, out.dtype):
+            out[first:first + len(block)] = block
+        return out
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'graph.csr')
+        writeGraphFile(path, network)
+        return computeDistanceMatrix(path, sources, workers, blockSize, dtype, out)
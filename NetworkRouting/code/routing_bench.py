@@ -0,0 +1,276 @@
+#!/usr/bin/python3
+
+# Benchmarks for NetworkRoutingSolver. Run from this directory:
+#
+#     python3 routing_bench.py [sizes...]
+#
+# It times Dijkstra on random networks, compares the object and CSR graphs,
+# times graph files and the multi-process distance matrix, stress-tests the
+# solver's binary heap and measures its extract-min throughput.
+#
+# Everything here is headless; no PyQt is needed. Networks are generated the
+# way Proj3GUI.generateNetwork does it, with (x, y) tuples for locations.
+
+import heapq
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from CS312Graph import *
+from NetworkRoutingSolver import *
+
+
+OUT_DEGREE = 3
+DATA_RANGE = {'x': [-1.5, 1.5], 'y': [-1.0, 1.0]}
+
+def random_network(size, out_degree=OUT_DEGREE, seed=312):
+    # nodeList and edgeList as Proj3GUI.generateNetwork builds them: uniform
+    # locations, and out_degree distinct random neighbours per node at
+    # 100 times the euclidean distance, sorted by neighbour id
+    rng = np.random.default_rng(seed)
+    xr, yr = DATA_RANGE['x'], DATA_RANGE['y']
+    xs = xr[0] + (xr[1] - xr[0]) * rng.random(size)
+    ys = yr[0] + (yr[1] - yr[0]) * rng.random(size)
+
+    # draw from size-1 ids and skip over u itself, then redraw rows that
+    # picked the same neighbour twice
+    u = np.arange(size)[:, None]
+    vs = rng.integers(0, size - 1, (size, out_degree))
+    vs += vs >= u
+    vs.sort(axis=1)
+    dup = (vs[:, 1:] == vs[:, :-1]).any(axis=1)
+    while dup.any():
+        rows = np.flatnonzero(dup)
+        redraw = rng.integers(0, size - 1, (len(rows), out_degree))
+        redraw += redraw >= rows[:, None]
+        redraw.sort(axis=1)
+        vs[rows] = redraw
+        dup = (vs[:, 1:] == vs[:, :-1]).any(axis=1)
+    lengths = 100.0 * np.hypot(xs[vs] - xs[:, None], ys[vs] - ys[:, None])
+
+    nodeList = list(zip(xs.tolist(), ys.tolist()))
+    edgeList = {i: list(zip(row, lens)) for i, (row, lens) in enumerate(zip(vs.tolist(), lengths.tolist()))}
+    return nodeList, edgeList
+
+def reference_distances(graph, source):
+    # Textbook heapq Dijkstra with lazy deletion, to check the solver against
+    dist = [np.inf] * graph.getNodeCount()
+    dist[source] = 0
+    queue = [(0, source)]
+    while queue:
+        d, u = heapq.heappop(queue)
+        if d > dist[u]:
+            continue
+        for v, length in graph.edgesFrom(u):
+            alt = d + length
+            if alt < dist[v]:
+                dist[v] = alt
+                heapq.heappush(queue, (alt, v))
+    return dist
+
+def bench_dijkstra(sizes=(1000, 10000, 100000, 1000000), array_limit=10000, seed=312):
+    # Heap (and, up to array_limit nodes, array) Dijkstra time from node 0.
+    # The heap time is also given per (V+E)log2(V), which stays roughly flat
+    # if the implementation really is O((V+E)logV).
+    rows = []
+    solver = NetworkRoutingSolver()
+    for size in sizes:
+        nodeList, edgeList = random_network(size, seed=seed)
+        graph = CS312Graph(nodeList, edgeList)
+        solver.initializeNetwork(graph)
+        row = {'V': size, 'E': size * OUT_DEGREE}
+        row['heap'] = solver.computeShortestPaths(0, use_heap=True)
+        assert solver.dist == reference_distances(graph, 0)
+        row['array'] = None
+        if size <= array_limit:
+            row['array'] = solver.computeShortestPaths(0, use_heap=False)
+            assert solver.dist == reference_distances(graph, 0)
+        row['heap_ns_per_op'] = 1e9 * row['heap'] / ((row['V'] + row['E']) * math.log2(size))
+        rows.append(row)
+    return rows
+
+
+GRAPH_TYPES = {'objects': CS312Graph, 'csr': CS312CSRGraph}
+
+def bench_graph_types(sizes=(10000, 100000, 1000000), seed=312):
+    # Build time, memory held by the built graph (tracemalloc) and heap
+    # Dijkstra time for the object and CSR representations of one network;
+    # both must give the same distances and the same path to the last node
+    rows = []
+    solver = NetworkRoutingSolver()
+    for size in sizes:
+        nodeList, edgeList = random_network(size, seed=seed)
+        row = {'V': size}
+        results = []
+        for name, graph_type in GRAPH_TYPES.items():
+            tracemalloc.start()
+            t1 = time.perf_counter()
+            graph = graph_type(nodeList, edgeList)
+            t2 = time.perf_counter()
+            row[name + '_mb'] = tracemalloc.get_traced_memory()[0] / 1e6
+            tracemalloc.stop()
+            row[name + '_build'] = t2 - t1
+            solver.initializeNetwork(graph)
+            row[name + '_heap'] = solver.computeShortestPaths(0, use_heap=True)
+            results.append((solver.dist, solver.getShortestPath(size - 1)))
+            del graph
+        assert all(r == results[0] for r in results)
+        rows.append(row)
+    return rows
+
+def bench_graph_file(sizes=(10000, 100000, 1000000), seed=312):
+    # Startup cost: building the graph from nodeList/edgeList as the GUI
+    # does against opening a graph file written once with writeGraphFile,
+    # plus the first heap Dijkstra on the mapped graph (which faults its
+    # pages in). The mapped graph must give the same distances.
+    rows = []
+    solver = NetworkRoutingSolver()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, 'graph{}.csr'.format(size))
+            nodeList, edgeList = random_network(size, seed=seed)
+            t1 = time.perf_counter()
+            graph = CS312CSRGraph(nodeList, edgeList)
+            t2 = time.perf_counter()
+            writeGraphFile(path, graph)
+            t3 = time.perf_counter()
+            mapped = openGraphFile(path)
+            t4 = time.perf_counter()
+            solver.initializeNetwork(mapped)
+            query = solver.computeShortestPaths(0, use_heap=True)
+            assert solver.dist == reference_distances(graph, 0)
+            rows.append({'V': size, 'file_mb': os.path.getsize(path) / 1e6, 'build': t2 - t1,
+                         'write': t3 - t2, 'open': t4 - t3, 'first_query': query})
+            del mapped
+    return rows
+
+def bench_distance_matrix(size=100000, sources=64, workers=(1, 2, 4), seed=312):
+    # Wall time of computeDistanceMatrix for `sources` evenly spread sources
+    # with different worker counts, against a serial computeShortestPaths
+    # loop; every matrix must match the serial one
+    nodeList, edgeList = random_network(size, seed=seed)
+    graph = CS312CSRGraph(nodeList, edgeList)
+    ids = list(range(0, size, size // sources))[:sources]
+    solver = NetworkRoutingSolver()
+    solver.initializeNetwork(graph)
+    t1 = time.perf_counter()
+    serial = np.empty((len(ids), size))
+    for row, source in enumerate(ids):
+        solver.computeShortestPaths(source, use_heap=True)
+        serial[row] = solver.dist
+    rows = [{'workers': 'serial', 'time': time.perf_counter() - t1}]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'graph.csr')
+        writeGraphFile(path, graph)
+        for count in workers:
+            t1 = time.perf_counter()
+            matrix = computeDistanceMatrix(path, ids, workers=count, dtype=np.float32)
+            rows.append({'workers': count, 'time': time.perf_counter() - t1})
+            assert np.array_equal(matrix, serial.astype(np.float32))
+    return rows
+
+def empty_network(size):
+    # size isolated nodes, enough for driving the solver's heap directly
+    return CS312Graph([(0.0, 0.0)] * size, [[] for _ in range(size)])
+
+def check_heap(solver):
+    # Every parent is no bigger than its children, and positionArray points
+    # every queued node at its slot and every other node at -1
+    heap, ids, pos = solver.binaryHeap, solver.pointerArray, solver.positionArray
+    assert len(heap) == len(ids)
+    for i in range(1, len(heap)):
+        assert heap[solver.parent(i)] <= heap[i], i
+    for i, node_id in enumerate(ids):
+        assert pos[node_id] == i, node_id
+    assert sum(p != -1 for p in pos) == len(ids)
+
+def stress_heap(size=2000, operations=20000, seed=312):
+    # Random interleaving of insert_heap, decreaseKey and deletemin_heap,
+    # checked against a plain dict of keys: every extraction must return a
+    # smallest key, and the heap invariant must hold after every operation.
+    rng = np.random.default_rng(seed)
+    solver = NetworkRoutingSolver()
+    solver.initializeNetwork(empty_network(size))
+    keys = {}
+    for _ in range(operations):
+        op = rng.integers(3)
+        if op == 0 and len(keys) < size:
+            node_id = int(rng.choice([i for i in range(size) if i not in keys]))
+            keys[node_id] = float(rng.integers(1000))
+            solver.insert_heap(keys[node_id], node_id)
+        elif op == 1 and keys:
+            node_id = int(rng.choice(list(keys)))
+            keys[node_id] -= float(rng.integers(keys[node_id] + 1))
+            solver.decreaseKey(node_id, keys[node_id])
+        elif keys:
+            node_id, distance = solver.deletemin_heap()
+            assert distance == keys.pop(node_id) == min(list(keys.values()) + [distance])
+        check_heap(solver)
+    return operations
+
+def bench_extract_min(sizes=(1000, 10000, 100000, 1000000), seed=312):
+    # Extractions per second when draining a heap of `size` random keys
+    rng = np.random.default_rng(seed)
+    rows = []
+    for size in sizes:
+        solver = NetworkRoutingSolver()
+        solver.initializeNetwork(empty_network(size))
+        for node_id, key in enumerate(rng.random(size).tolist()):
+            solver.insert_heap(key, node_id)
+        t1 = time.perf_counter()
+        last = -np.inf
+        while solver.binaryHeap:
+            _, distance = solver.deletemin_heap()
+            assert distance >= last
+            last = distance
+        t2 = time.perf_counter()
+        rows.append({'size': size, 'extract_per_sec': size / (t2 - t1)})
+    return rows
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000, 1000000]
+    print('Dijkstra from node 0, out-degree {}'.format(OUT_DEGREE))
+    print('{:>9}{:>10}{:>12}{:>12}{:>22}'.format('V', 'E', 'heap sec', 'array sec', 'heap ns/((V+E)logV)'))
+    for r in bench_dijkstra(sizes):
+        array = '{:>12}'.format('-') if r['array'] is None else '{:>12.4f}'.format(r['array'])
+        print('{:>9}{:>10}{:>12.4f}'.format(r['V'], r['E'], r['heap']) + array
+              + '{:>22.1f}'.format(r['heap_ns_per_op']))
+    print()
+
+    print('Object graph vs CSR graph')
+    print('{:>9}{:>12}{:>12}{:>12}{:>12}{:>12}{:>12}'.format('V', 'obj MB', 'csr MB', 'obj build', 'csr build',
+                                                       'obj heap', 'csr heap'))
+    for r in bench_graph_types(sizes):
+        print('{:>9}{:>12.1f}{:>12.1f}{:>12.3f}{:>12.3f}{:>12.3f}{:>12.3f}'.format(r['V'], r['objects_mb'],
+              r['csr_mb'], r['objects_build'], r['csr_build'], r['objects_heap'], r['csr_heap']))
+    print()
+
+    print('Graph file startup')
+    print('{:>9}{:>10}{:>12}{:>12}{:>12}{:>14}'.format('V', 'file MB', 'build sec', 'write sec', 'open sec',
+                                                       'query sec'))
+    for r in bench_graph_file(sizes):
+        print('{:>9}{:>10.1f}{:>12.4f}{:>12.4f}{:>12.6f}{:>14.4f}'.format(r['V'], r['file_mb'], r['build'],
+              r['write'], r['open'], r['first_query']))
+    print()
+
+    matrix_size = min(sizes[-1], 100000)
+    print('Distance matrix, 64 sources x {} nodes (float32)'.format(matrix_size))
+    print('{:>9}{:>12}'.format('workers', 'sec'))
+    for r in bench_distance_matrix(matrix_size):
+        print('{:>9}{:>12.3f}'.format(r['workers'], r['time']))
+    print()
+
+    operations = stress_heap()
+    print('Heap invariant held over {} random insert/decreaseKey/deletemin operations'.format(operations))
+    print()
+
+    print('Extract-min throughput, draining a heap of random keys')
+    print('{:>9}{:>16}'.format('size', 'extracts/sec'))
+    for r in bench_extract_min(sizes):
+        print('{:>9}{:>16.0f}'.format(r['size'], r['extract_per_sec']))